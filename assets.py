@@ -0,0 +1,135 @@
+#MEDIA ASSETS
+"""
+Page images, resolved portably and served as variants resized to their rendered width.
+
+Streamlit sends JPEG and PNG bytes to the browser as they are but decodes and
+re-encodes any other format (and any image wider than the content), so opaque
+images become JPEG variants and images with transparency optimized PNG ones.
+Variants are named after the content hash of their source, so they are rebuilt
+only when the image changes. Pre-generate them at deploy time with:
+
+    python assets.py
+"""
+import io
+import os
+import hashlib
+import functools
+from PIL import Image
+
+MEDIA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "media")
+BUILD_DIR = os.path.join(MEDIA_DIR, "build")
+
+# Rendered width in pixels of every page image (wide layout, team photos in 5 columns),
+# at most 1460 px, the width above which Streamlit resizes the image itself
+ASSETS = {
+    "bike0.png": 1460,
+    "bike2.png": 480,
+    "ie.png": 160,
+    "nicole.jpg": 320,
+    "nilesh.png": 320,
+    "alejandro.png": 320,
+    "charles.png": 320,
+    "nic.png": 320,
+    "pycaret.png": 1200,
+}
+
+JPEG_QUALITY = 82
+
+
+def asset_path(name):
+    """Absolute path of a media file, `name` may use Windows or POSIX separators and include `media/`."""
+    parts = [part for part in name.replace("\\", "/").split("/") if part]
+    if parts and parts[0] == "media":
+        parts = parts[1:]
+    return os.path.join(MEDIA_DIR, *parts)
+
+
+@functools.lru_cache(maxsize=None)
+def _source_hash(path, mtime, size):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def _load(path):
+    # RGB, or RGBA when some pixel is actually transparent
+    with Image.open(path) as image:
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    if image.mode == "RGBA" and image.getextrema()[3][0] == 255:
+        image = image.convert("RGB")
+    return image
+
+
+@functools.lru_cache(maxsize=None)
+def _variant_format(path, mtime, size):
+    return "PNG" if _load(path).mode == "RGBA" else "JPEG"
+
+
+def variant_path(name, width=None):
+    """Path of the JPEG or PNG variant of a media file at a given width (content hash named)."""
+    source = asset_path(name)
+    stat = os.stat(source)
+    width = width or ASSETS.get(os.path.basename(source))
+    stem = os.path.splitext(os.path.basename(source))[0]
+    digest = _source_hash(source, stat.st_mtime_ns, stat.st_size)
+    extension = "png" if _variant_format(source, stat.st_mtime_ns, stat.st_size) == "PNG" else "jpg"
+    return os.path.join(BUILD_DIR, f"{stem}-{width}w-{digest}.{extension}")
+
+
+def build_variant(name, width=None):
+    """Resize and compress a media file to JPEG (PNG when transparent), skipped when the variant already exists."""
+    target = variant_path(name, width)
+    if os.path.exists(target):
+        return target
+    width = width or ASSETS.get(os.path.basename(asset_path(name)))
+
+    image = _load(asset_path(name))
+    if width and image.width > width:
+        image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+    buffer = io.BytesIO()
+    if image.mode == "RGBA":
+        image.save(buffer, format="PNG", optimize=True)
+    else:
+        image.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    # write then rename, so concurrent sessions never read a partial file
+    partial = f"{target}.{os.getpid()}.tmp"
+    with open(partial, 'wb') as f:
+        f.write(buffer.getvalue())
+    os.replace(partial, target)
+    return target
+
+
+@functools.lru_cache(maxsize=None)
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def image_bytes(name, width=None):
+    """
+    Bytes of the optimized variant of a page image, kept in memory across reruns.
+
+    Args:
+        name (str): Media file name, e.g. "bike0.png" or "media\\bike0.png".
+        width (int): Rendered width in pixels, defaults to the width listed in ASSETS.
+
+    Returns:
+        bytes: JPEG or PNG image, passed through unchanged by st.image and st.logo.
+    """
+    return _read(build_variant(name, width))
+
+
+def build_all():
+    """Pre-generate the variants of every asset listed in ASSETS."""
+    for name, width in ASSETS.items():
+        if not os.path.exists(asset_path(name)):
+            print(f"warning: {asset_path(name)} not found")
+            continue
+        target = build_variant(name, width)
+        print(f"{name}: {os.path.getsize(asset_path(name)) / 1024:.0f} KiB -> {os.path.getsize(target) / 1024:.0f} KiB ({os.path.basename(target)})")
+
+
+if __name__ == '__main__':
+    build_all()
@@ -0,0 +1,323 @@
+#BENCHMARKS
+"""
+Reproducible, headless benchmarks of the app against the bundled data and model:
+
+    python benchmark.py --out bench_results/current.json
+    python benchmark.py --baseline bench_results/baseline.json --threshold 0.2
+
+Every benchmark runs with empty caches (a temporary on-disk cache, a drill-down
+database rebuilt from the CSV and cleared Streamlit caches), so it measures the
+work a cold visitor triggers. Only what a module builds once at import stays
+warm: the served model and the calendar table of bikeprediction3 (model_load
+times the model on its own). The figure_* benchmarks are the exception, they
+time the figure builders of the pages on data loaded once. A benchmark
+that raises is recorded as failed and the others still run. The exit code is 1
+when a benchmark failed or is slower than the baseline by more than the threshold.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import traceback
+import tempfile
+import statistics
+import subprocess
+import tracemalloc
+import datetime as dt
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# keep the benchmark caches away from the app ones, before any project module is imported
+_tmp = tempfile.mkdtemp(prefix="bikes-bench-")
+os.environ["BIKES_CACHE_PATH"] = os.path.join(_tmp, "cache.sqlite")
+os.environ["BIKES_DB_PATH"] = os.path.join(_tmp, "bikes.sqlite")
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+# name -> (function, reset caches before each run)
+BENCHMARKS = {}
+
+
+def benchmark(name, cold=True):
+    def register(func):
+        BENCHMARKS[name] = (func, cold)
+        return func
+    return register
+
+
+def reset_caches():
+    from persistent_cache import get_cache
+    from sql_backend import get_database, _cached_drilldown
+    get_cache().clear()
+    _cached_drilldown.cache_clear()
+    # the next get_database() rebuilds the table and its indexes
+    get_database.cache_clear()
+    if os.path.exists(os.environ["BIKES_DB_PATH"]):
+        os.remove(os.environ["BIKES_DB_PATH"])
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def _run_page(root, module_name, function_name):
+    # runs inside AppTest, from a temporary script file
+    import sys
+    import importlib
+    sys.path.insert(0, root)
+    getattr(importlib.import_module(module_name), function_name)()
+
+
+def run_page(module_name, function_name, timeout=300):
+    """Full script run of one page, like a first visit."""
+    at = AppTest.from_function(_run_page, args=(ROOT, module_name, function_name), default_timeout=timeout)
+    at.run()
+    check_run(at, f"{module_name}.{function_name}")
+    return at
+
+
+def check_run(at, name):
+    if at.exception:
+        raise RuntimeError(f"{name} raised: {at.exception[0].message}")
+
+
+# MODEL
+@benchmark("model_load")
+def bench_model_load():
+    from pycaret.classification import load_model
+    from model_store import served_model
+    load_model(model_name=served_model(), verbose=False)
+
+
+@benchmark("prediction_single")
+def bench_prediction_single():
+    from bikeprediction3 import prediction
+    prediction(dt.date(2012, 6, 15), dt.time(8), "Clear/Sunny", 25, "Low", "Medium")
+
+
+@benchmark("prediction_batch_1000")
+def bench_prediction_batch():
+    from bikeprediction3 import batch_prediction
+    rng = np.random.default_rng(0)
+    requests = pd.DataFrame({
+        'dteday': pd.Timestamp("2012-01-01") + pd.to_timedelta(rng.integers(0, 731, 1000), unit='D'),
+        'hr': rng.integers(0, 24, 1000),
+        'weathersit': rng.choice(["Clear/Sunny", "Cloudy/Misty", "Light Snow/Rain", "Heavy Rain/Snow"], 1000),
+        'temp': rng.integers(-30, 50, 1000),
+        'Wind': rng.choice(["Low", "Medium", "High"], 1000),
+        'Hum': rng.choice(["Low", "Medium", "High"], 1000),
+    })
+    batch_prediction(requests)
+
+
+@benchmark("model_evaluation")
+def bench_model_evaluation():
+    from results import evaluate_model
+    evaluate_model()
+
+
+# DATA
+@benchmark("csv_load_clean")
+def bench_csv_load_clean():
+    pd.read_csv(os.path.join(ROOT, "bikes_clean_data.csv"))
+
+
+@benchmark("csv_load_viz")
+def bench_csv_load_viz():
+    pd.read_csv(os.path.join(ROOT, "bikes_data_viz.csv"))
+
+
+@benchmark("time_index_viz")
+def bench_time_index():
+    from timeindex import load_indexed
+    load_indexed("bikes_data_viz.csv")
+
+
+@benchmark("dashboard_aggregates")
+def bench_dashboard_aggregates():
+    from interactive import dashboard_aggregates
+    dashboard_aggregates()
+
+
+@benchmark("sql_drilldown")
+def bench_sql_drilldown():
+    # table build from the CSV and first query
+    from sql_backend import get_database, drilldown
+    get_database()
+    drilldown({'season': [2, 3], 'Rush': ["Rush"]}, ['hr', 'weathersit'])
+
+
+# FIGURES
+# figure builders of the pages on already loaded data, serialized like st.plotly_chart does
+_loaded = {}
+
+
+def loaded(name, load):
+    """Data loaded on first use and kept for the next runs, out of the figure timings."""
+    if name not in _loaded:
+        _loaded[name] = load()
+    return _loaded[name]
+
+
+@benchmark("figure_temperature_scatter", cold=False)
+def bench_figure_scatter():
+    from interactive import load_dashboard_data, temperature_scatter
+    temperature_scatter(loaded("dashboard", load_dashboard_data)).to_json()
+
+
+@benchmark("figure_demand_heatmap", cold=False)
+def bench_figure_heatmap():
+    from business import demand_heatmap
+    demand_heatmap(loaded("viz", lambda: pd.read_csv(os.path.join(ROOT, "bikes_data_viz.csv")))).to_json()
+
+
+# PAGES
+@benchmark("page_main")
+def bench_page_main():
+    run_page("main_page", "main_page")
+
+
+@benchmark("page_data_visualization")
+def bench_page_dashboard():
+    run_page("interactive", "bike_rental_dashboard")
+
+
+@benchmark("page_technical_annex")
+def bench_page_annex():
+    run_page("features", "main_feature_engineering")
+
+
+@benchmark("page_results")
+def bench_page_results():
+    run_page("results", "main_results")
+
+
+@benchmark("page_business_insights")
+def bench_page_business():
+    run_page("business", "bike_sharing_business")
+
+
+@benchmark("page_bike_prediction_submit")
+def bench_page_prediction():
+    at = run_page("bikeprediction3", "main_bikeprediction")
+    at.button[0].click().run()
+    check_run(at, "bikeprediction3 submit")
+
+
+def measure(func, cold, repeat):
+    """Run times in seconds (after one untimed warm-up run) and peak traced memory in KiB."""
+    if cold:
+        reset_caches()
+    func()
+
+    times = []
+    for _ in range(repeat):
+        if cold:
+            reset_caches()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    if cold:
+        reset_caches()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'median_s': statistics.median(times),
+        'min_s': min(times),
+        'mean_s': statistics.fmean(times),
+        'repeat': repeat,
+        'peak_kib': peak / 1024,
+    }
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        'timestamp': dt.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pandas': pd.__version__,
+        'streamlit': st.__version__,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print the ratio to the baseline of every benchmark, return the names of the regressions."""
+    regressions = []
+    for name, current in results['benchmarks'].items():
+        previous = baseline['benchmarks'].get(name)
+        if 'error' in current:
+            continue
+        if previous is None or 'error' in previous:
+            print(f"{name:32s} new")
+            continue
+        ratio = current['median_s'] / previous['median_s']
+        flag = "REGRESSION" if ratio > 1 + threshold else ""
+        print(f"{name:32s} {previous['median_s'] * 1000:10.1f} ms -> {current['median_s'] * 1000:10.1f} ms  x{ratio:5.2f}  {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bike sharing app.")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--out", default=None, help="JSON file to write the results to")
+    parser.add_argument("--baseline", default=None, help="JSON results of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown over the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+
+    results = {'meta': metadata(), 'benchmarks': {}}
+    failures = []
+    for name in args.only or BENCHMARKS:
+        func, cold = BENCHMARKS[name]
+        try:
+            result = measure(func, cold, args.repeat)
+        except Exception as error:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            results['benchmarks'][name] = {'error': f"{type(error).__name__}: {error}", 'traceback': traceback.format_exc()}
+            failures.append(name)
+            print(f"{name:32s} FAILED  {type(error).__name__}: {error}")
+            continue
+        results['benchmarks'][name] = result
+        print(f"{name:32s} median {result['median_s'] * 1000:10.1f} ms  min {result['min_s'] * 1000:10.1f} ms  peak {result['peak_kib'] / 1024:8.1f} MiB")
+
+    if args.out:
+        if os.path.dirname(args.out):
+            os.makedirs(os.path.dirname(args.out), exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+    if failures:
+        print(f"{len(failures)} failed benchmark(s): {', '.join(failures)}")
+    if regressions or failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,124 +5,84 @@ import numpy as np
 import datetime as dt
 import pycaret
 from pycaret.classification import *
+from calendar_table import get_calendar
+from persistent_cache import get_cache, namespace, MODEL_PATH
+from serving import build_scorer
+from model_store import served_model
 
 
 # Loading the trained model
 # with open("model.pkl", 'rb') as pickle_in:
 #     model = joblib.load(pickle_in)
 
-model = load_model(model_name='my_second_bike_model')
+MODEL_NAME = served_model()
+model = load_model(model_name=MODEL_NAME)
+
+# preprocesses each request batch once for the primary model and the shadow models (BIKES_SHADOW_MODELS)
+scorer = build_scorer(model, MODEL_NAME)
+
+# Precomputed date features (season, weekday, workingday, DC holidays, TOD/Rush bins)
+calendar = get_calendar()
+
+weathersit_codes = {"Clear/Sunny": 1, "Cloudy/Misty": 2, "Light Snow/Rain": 3, "Heavy Rain/Snow": 4}
+
+# column order the model was trained with
+model_columns = ['season', 'yr', 'mnth', 'hr', 'holiday', 'weekday', 'workingday', 'weathersit', 'temp', 'atemp', 'hum', 'windspeed', 'TOD', 'Rush', 'Wind', 'Hum', 'prev_count']
+
+def add_user_features(df, weathersit, temp, wind, Hum):
+    # TRANSFORMATIONS of the user inputs on top of the calendar features
+    df['weathersit'] = pd.Series(weathersit, index=df.index).map(weathersit_codes).fillna(4).astype(int)
+    df['temp'] = np.asarray(temp, dtype=float) / 41
+    df['Wind'] = wind
+    df['Hum'] = Hum
+
+    #variables that are ignored in Pycaret so we don't care about the value; only included to have the full DF
+    df['atemp'] = 0
+    df['hum'] = 0
+    df['windspeed'] = 0
+    df['prev_count'] = 0
+
+    return df[model_columns]
+
+def prediction_key(dteday, hour, weathersit, temp, wind, Hum):
+    # key of a form answer in the on-disk cache
+    return ("prediction", dteday.isoformat(), int(hour), weathersit, temp, wind, Hum)
 
 # defining the function which will make the prediction using the data which the user inputs TRANSFORMATIONS & RUNNING MODEL
-def prediction(dteday, season, yr, mnth, hr, holiday, weekday, workingday, weathersit, temp, atemp, hum, windspeed, tod, rush, wind, Hum, prev_count):
-
-    if dteday.month == 1:
-        mnth = 1
-    elif dteday.month == 2:
-        mnth = 2
-    elif dteday.month == 3:
-        mnth = 3
-    elif dteday.month == 4:
-        mnth = 4
-    elif dteday.month == 5:
-        mnth = 5
-    elif dteday.month == 6:
-        mnth = 6
-    elif dteday.month == 7:
-        mnth = 7
-    elif dteday.month == 8:
-        mnth = 8
-    elif dteday.month == 9:
-        mnth = 9
-    elif dteday.month == 10:
-        mnth = 10
-    elif dteday.month == 11:
-        mnth = 11
-    elif dteday.month == 3:
-        mnth = 3
-    else:
-        mnth = 12
-
-    if dteday.month in [3,4,5]:
-        season = 1
-    elif dteday.month in [6,7,8]:
-        season = 2
-    elif dteday.month in [9,10,11]:
-        season = 3
-    else:
-        season = 4
-
-    hr = hr.hour
-
-    if holiday == "No":
-        holiday = 0
-    else:
-        holiday = 1
-
-    weekday = dteday.weekday
-
-    if (dteday.weekday in [1,2,3,4,5]) and (holiday == 0):
-        workingday = 1
-    else:
-        workingday = 0
-
-    if weathersit == "Clear/Sunny":
-        weathersit = 1
-    elif weathersit == "Cloudy/Misty":
-        weathersit = 2
-    elif weathersit == "Light Snow/Rain":
-        weathersit = 3
-    else:
-        weathersit = 4
-    
-    tod = hr
-    if 6 <= tod < 12:
-        tod == "Morning"
-    elif 12 <= tod < 17:
-        tod = "Afternoon"
-    elif 17 <= tod < 21:
-        tod = "Evening"
-    else:
-        tod = "Night"
-
-    temp = temp/41
-    atemp = atemp/50
-    hum = hum/100
-    windspeed = windspeed/100
-
-
-    ################################
-
-    data = {
-        'season': season,
-        'yr': yr,  
-        'mnth': mnth,  
-        'hr': hr,  
-        'holiday' : holiday,
-        'weekday': weekday,
-        'workingday' : workingday,
-        'weathersit': weathersit,
-        'temp': temp,
-        'atemp' : atemp,
-        'hum': hum,
-        'windspeed': windspeed, 
-        'TOD': tod,
-        'Rush': rush,
-        'Wind': wind,
-        'Hum' : Hum,
-        'prev_count': prev_count
-    }
-
-
-    # Convert data into dataframe
-    df = pd.DataFrame.from_dict([data])
-
-    predicted_value = predict_model(model,df)
-    predicted_value = pd.DataFrame(predicted_value)
-    prediction2 = predicted_value["prediction_label"][0]
+def prediction(dteday, hr, weathersit, temp, wind, Hum):
+
+    def predict():
+        # O(1) lookup of the date features in the calendar table
+        data = calendar.lookup(dteday, hr.hour)
+
+        # Convert data into dataframe
+        df = add_user_features(pd.DataFrame.from_dict([data]), weathersit, temp, wind, Hum)
 
+        return scorer.score(df)[0]
+
+    # answers are kept on disk per model, so they survive restarts
+    key = prediction_key(dteday, hr.hour, weathersit, temp, wind, Hum)
+    prediction2 = get_cache().get_or_compute(namespace(MODEL_PATH), key, predict)
 
     return prediction2
+
+def batch_prediction(requests, shadow=True):
+    """
+    Score many requests at once.
+
+    Args:
+        requests (pd.DataFrame): One row per request with the columns `dteday`, `hr` (0 to 23),
+            `weathersit`, `temp` (Celsius), `Wind` and `Hum`, same values as the form below.
+        shadow (bool): Also score the shadow models, False for synthetic requests (cache warm-up).
+
+    Returns:
+        pd.Series: Predicted count for each request, aligned with `requests`.
+    """
+    # vectorized join of the date features from the calendar table
+    df = calendar.join(requests['dteday'], requests['hr'])
+    df = add_user_features(df, requests['weathersit'].to_numpy(), requests['temp'].to_numpy(), requests['Wind'].to_numpy(), requests['Hum'].to_numpy())
+
+    return pd.Series(scorer.score(df, shadow), index=requests.index)
     
 
 ##############################
@@ -146,17 +106,14 @@ def main_bikeprediction():
 ################################
           
     # Following lines create input fields for prediction 
-    dteday = st.date_input("What date would you like your bike?", format="YYYY-MM-DD", value="today")
+    first_day, last_day = calendar.date_bounds()
+    dteday = st.date_input("What date would you like your bike?", format="YYYY-MM-DD", value="today", min_value=first_day, max_value=last_day)
 
     hr = st.time_input('What hour do you want your bike?',value="now",step=3600)
 
-    holiday = st.selectbox('Is it a holiday?', ("Yes", "No"))
-
     #tods = ("Morning","Afternoon","Evening","Night")
     #tod = st.selectbox('What time of day do you need the bike?', tods)
 
-    rush = st.selectbox('Is it rush hour?', ("Rush", "Not Rush"))
-
     winds = ("Low","Medium","High")
     wind = st.selectbox('How windy is it?', winds)
 
@@ -168,25 +125,10 @@ def main_bikeprediction():
     Hums = ("Low","Medium","High")
     Hum = st.selectbox("How's the humidity?", Hums)
 
-    #variables that are ignored in Pycaret so we don't care about the value; only included to have the full DF
-    yr=0
-    windspeed = 0
-    atemp=0
-    hum=0
-    prev_count = 0
-
-    #variables that will be calculated afterwards
-    weekday=0
-    workingday=0
-    season = 0
-    tod = 0
-    mnth=0
-
-
     result = ""
     # when 'Predict' is clicked, make the prediction and store it 
     if st.button("Predict"): 
-        result = prediction(dteday, season, yr, mnth, hr, holiday, weekday, workingday, weathersit, temp, atemp, hum, windspeed, tod, rush, wind, Hum,prev_count)
+        result = prediction(dteday, hr, weathersit, temp, wind, Hum)
         #st.success(result)
 
         st.success(f"The amount of available bikes for the date selected is {1000 - result}")
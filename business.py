@@ -1,6 +1,50 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
+from persistent_cache import get_cache, namespace
+
+# Define month names for display
+month_names = {
+    1: "January", 2: "February", 3: "March", 4: "April",
+    5: "May", 6: "June", 7: "July", 8: "August",
+    9: "September", 10: "October", 11: "November", 12: "December"
+}
+
+def demand_heatmap(data):
+    """Heatmap of the total bike demand by hour of the day and month."""
+    # Mapping the months to their names for the heatmap, ordered like the calendar
+    month_name = pd.Categorical(data['mnth'].map(month_names), categories=list(month_names.values()), ordered=True)
+
+    # Create a pivot table for the heatmap
+    heatmap_data = data.assign(month_name=month_name).pivot_table(values='cnt', index='hr', columns='month_name', aggfunc='sum', observed=False)
+
+    # Prepare data for Plotly interactive heatmap
+    heatmap_data = heatmap_data.reset_index().melt(id_vars='hr', var_name='Month', value_name='Bike Demand')
+
+    fig = go.Figure(data=go.Heatmap(
+        x=heatmap_data['Month'],
+        y=heatmap_data['hr'],
+        z=heatmap_data['Bike Demand'],
+        colorscale='RdYlGn_r',
+        colorbar=dict(title="Bike Demand"),
+        zmin=heatmap_data['Bike Demand'].min(),
+        zmax=heatmap_data['Bike Demand'].max(),
+        hoverongaps=False,
+        text=heatmap_data['Bike Demand'],
+        texttemplate="%{text}",
+        textfont={"size": 10}
+        ))
+
+    fig.update_layout(
+        title="Bike Demand by Hour and Month",
+        xaxis_title="Month",
+        yaxis_title="Hour of the Day",
+        width=1200,
+        height=800,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        )
+    return fig
 
 def bike_sharing_business(data_path="bikes_data_viz.csv"):
     """
@@ -13,16 +57,9 @@ def bike_sharing_business(data_path="bikes_data_viz.csv"):
     # Load the data
     @st.cache_data
     def load_data(path):
-        return pd.read_csv(path)
+        return get_cache().get_or_compute(namespace(path), "raw_data", lambda: pd.read_csv(path))
 
     data = load_data(data_path)
-
-    # Define month names for display
-    month_names = {
-        1: "January", 2: "February", 3: "March", 4: "April",
-        5: "May", 6: "June", 7: "July", 8: "August",
-        9: "September", 10: "October", 11: "November", 12: "December"
-    }
   
     # Business Page content
     html_temp = """
@@ -71,41 +108,8 @@ def bike_sharing_business(data_path="bikes_data_viz.csv"):
         - **Yearly Maintenance and Repairs:** Perform major maintenance during low-utilization months (January and February).
         """)
 
-    # Mapping the months to their names for the heatmap
-    data['month_name'] = data['mnth'].map(month_names)
-    data['month_name'] = pd.Categorical(data['month_name'], categories=list(month_names.values()), ordered=True)
-
-    # Create a pivot table for the heatmap
-    heatmap_data = data.pivot_table(values='cnt', index='hr', columns='month_name', aggfunc='sum')
-
-    # Prepare data for Plotly interactive heatmap
-    heatmap_data = heatmap_data.reset_index().melt(id_vars='hr', var_name='Month', value_name='Bike Demand')
-
-    fig = go.Figure(data=go.Heatmap(
-        x=heatmap_data['Month'],
-        y=heatmap_data['hr'],
-        z=heatmap_data['Bike Demand'],
-        colorscale='RdYlGn_r',
-        colorbar=dict(title="Bike Demand"),
-        zmin=heatmap_data['Bike Demand'].min(),
-        zmax=heatmap_data['Bike Demand'].max(),
-        hoverongaps=False,
-        text=heatmap_data['Bike Demand'],
-        texttemplate="%{text}",
-        textfont={"size": 10}
-        ))
-
-    fig.update_layout(
-        title="Bike Demand by Hour and Month",
-        xaxis_title="Month",
-        yaxis_title="Hour of the Day",
-        width=1200,
-        height=800,
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        )
-
-    st.plotly_chart(fig)
+    # Hour by month demand heatmap
+    st.plotly_chart(demand_heatmap(data))
 
     st.header("4. Demand-Based Pricing and User-Specific Adjustments")
     st.write("""
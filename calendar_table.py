@@ -0,0 +1,180 @@
+#CALENDAR TABLE
+import datetime as dt
+import functools
+import numpy as np
+import pandas as pd
+
+# Default range covered by the precomputed calendar
+START_YEAR = 2011
+END_YEAR = 2035
+
+# First year of the dataset, `yr` is stored as an offset from it (0: 2011, 1: 2012)
+BASE_YEAR = 2011
+
+# Per hour bins, same definitions as in the feature engineering (see Technical Annex)
+TOD_LABELS = np.array(["Night", "Morning", "Afternoon", "Evening"])
+TOD_BY_HOUR = np.array([0] * 6 + [1] * 6 + [2] * 5 + [3] * 4 + [0] * 3, dtype=np.int8)
+RUSH_LABELS = np.array(["Not Rush", "Rush"])
+RUSH_BY_HOUR = np.zeros(24, dtype=np.int8)
+RUSH_BY_HOUR[[7, 8, 17, 18]] = 1
+
+# Corrected season per month (1: spring, 2: summer, 3: fall, 4: winter)
+SEASON_BY_MONTH = np.array([0, 4, 4, 1, 1, 1, 2, 2, 2, 3, 3, 3, 4], dtype=np.int8)
+
+# Columns produced for every (date, hour) pair
+CALENDAR_COLUMNS = ['season', 'yr', 'mnth', 'hr', 'holiday', 'weekday', 'workingday', 'TOD', 'Rush']
+
+
+def _nth_weekday(year, month, weekday, n):
+    """n-th given weekday (Monday: 0) of a month, n=-1 for the last one."""
+    if n > 0:
+        first = dt.date(year, month, 1)
+        return first + dt.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = dt.date(year + month // 12, month % 12 + 1, 1) - dt.timedelta(days=1)
+    return last - dt.timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day):
+    """Holidays falling on a Saturday are observed on Friday, on a Sunday on Monday."""
+    if day.weekday() == 5:
+        return day - dt.timedelta(days=1)
+    if day.weekday() == 6:
+        return day + dt.timedelta(days=1)
+    return day
+
+
+def dc_holidays(year):
+    """
+    Observed public holidays of the District of Columbia for one year.
+
+    Follows the DC holiday schedule (http://dchr.dc.gov/page/holiday-schedule) the
+    `holiday` column of the original dataset was extracted from.
+
+    Returns:
+        set: datetime.date of every observed holiday.
+    """
+    fixed = [(1, 1), (4, 16), (7, 4), (11, 11), (12, 25)]
+    if year >= 2021:
+        fixed.append((6, 19))  # Juneteenth
+    days = {_observed(dt.date(year, month, day)) for month, day in fixed}
+    days.update({
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 10, 0, 2),  # Columbus Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving Day
+    })
+    if (year - 1) % 4 == 0:
+        # Inauguration Day, moved to Monday when the 20th is a Sunday
+        inauguration = dt.date(year, 1, 20)
+        if inauguration.weekday() == 6:
+            inauguration += dt.timedelta(days=1)
+        if inauguration.weekday() < 5:
+            days.add(inauguration)
+    return days
+
+
+class CalendarTable:
+    """
+    Date derived features precomputed for every day of [start_year, end_year].
+
+    Each feature is stored as a compact int8 array indexed by the day ordinal
+    relative to the first day, so a single lookup is O(1) and a batch of dates
+    is joined with one fancy-indexing pass.
+    """
+
+    def __init__(self, start_year=START_YEAR, end_year=END_YEAR):
+        self.start_year = start_year
+        self.end_year = end_year
+        self.first_day = np.datetime64(f"{start_year}-01-01", 'D')
+        self.first_ordinal = dt.date(start_year, 1, 1).toordinal()
+
+        days = np.arange(self.first_day, np.datetime64(f"{end_year + 1}-01-01", 'D'))
+        years = days.astype('datetime64[Y]').astype(np.int64) + 1970
+        months = days.astype('datetime64[M]').astype(np.int64) % 12 + 1
+
+        holidays = set()
+        # New Year's Day of the following year can be observed on December 31st
+        for year in range(start_year, end_year + 2):
+            holidays.update(dc_holidays(year))
+        holidays = np.array(sorted(holidays), dtype='datetime64[D]')
+
+        self.mnth = months.astype(np.int8)
+        self.yr = (years - BASE_YEAR).astype(np.int8)
+        self.season = SEASON_BY_MONTH[months]
+        # 0: Sunday ... 6: Saturday, numpy epoch (1970-01-01) was a Thursday
+        self.weekday = ((days.astype(np.int64) + 4) % 7).astype(np.int8)
+        self.holiday = np.isin(days, holidays).astype(np.int8)
+        self.workingday = ((self.weekday >= 1) & (self.weekday <= 5) & (self.holiday == 0)).astype(np.int8)
+
+    def __len__(self):
+        return len(self.mnth)
+
+    def date_bounds(self):
+        """First and last day covered by the table."""
+        return dt.date(self.start_year, 1, 1), dt.date(self.end_year, 12, 31)
+
+    def _position(self, day):
+        pos = day.toordinal() - self.first_ordinal
+        if not 0 <= pos < len(self):
+            raise ValueError(f"{day} is outside of the calendar range {self.start_year}-{self.end_year}")
+        return pos
+
+    def lookup(self, day, hr):
+        """
+        Calendar features of a single date and hour.
+
+        Args:
+            day (datetime.date): Date to look up.
+            hr (int): Hour of the day (0 to 23).
+
+        Returns:
+            dict: One value per name of CALENDAR_COLUMNS.
+        """
+        pos = self._position(day)
+        return {
+            'season': int(self.season[pos]),
+            'yr': int(self.yr[pos]),
+            'mnth': int(self.mnth[pos]),
+            'hr': int(hr),
+            'holiday': int(self.holiday[pos]),
+            'weekday': int(self.weekday[pos]),
+            'workingday': int(self.workingday[pos]),
+            'TOD': TOD_LABELS[TOD_BY_HOUR[hr]],
+            'Rush': RUSH_LABELS[RUSH_BY_HOUR[hr]],
+        }
+
+    def join(self, dates, hours):
+        """
+        Vectorized calendar features of many (date, hour) pairs.
+
+        Args:
+            dates (array-like): Dates, anything pandas can convert to datetime.
+            hours (array-like): Hours of the day (0 to 23).
+
+        Returns:
+            pd.DataFrame: One row per pair with the CALENDAR_COLUMNS.
+        """
+        days = pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[D]')
+        hours = np.asarray(hours, dtype=np.int64)
+        pos = (days - self.first_day).astype(np.int64)
+        if len(pos) and (pos.min() < 0 or pos.max() >= len(self)):
+            raise ValueError(f"dates outside of the calendar range {self.start_year}-{self.end_year}")
+        return pd.DataFrame({
+            'season': self.season[pos],
+            'yr': self.yr[pos],
+            'mnth': self.mnth[pos],
+            'hr': hours,
+            'holiday': self.holiday[pos],
+            'weekday': self.weekday[pos],
+            'workingday': self.workingday[pos],
+            'TOD': TOD_LABELS[TOD_BY_HOUR[hours]],
+            'Rush': RUSH_LABELS[RUSH_BY_HOUR[hours]],
+        })
+
+
+@functools.lru_cache(maxsize=None)
+def get_calendar(start_year=START_YEAR, end_year=END_YEAR):
+    """Calendar table for a date range, built once per process."""
+    return CalendarTable(start_year, end_year)
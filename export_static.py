@@ -0,0 +1,225 @@
+#STATIC EXPORT
+"""
+Render the analysis pages without inputs, which show the same content to every
+visitor, into a static bundle any static file server can host:
+
+    python export_static.py --out static_site --app-url https://bikes.example.org
+
+Then run the Streamlit app with BIKES_STATIC_URL pointing to the bundle, it only
+serves the pages that need a server: Data Visualization (date filters and
+drill-down queries), Results and Bike Prediction.
+"""
+import os
+import html
+import shutil
+import hashlib
+import argparse
+import importlib
+import textwrap
+import markdown
+import streamlit
+from plotly.offline import get_plotlyjs
+
+# (file name, title, module, page function) of the exported pages, in navigation order
+PAGES = [
+    ("index", "🏠Main Page", "main_page", "main_page"),
+    ("annex", "🗃️Technical Annex", "features", "main_feature_engineering"),
+    ("business", "📈Business Insights", "business", "bike_sharing_business"),
+]
+
+# Pages left to the Streamlit app
+APP_PAGES = ["📊Data Visualization", "🧪Results", "🚲Bike Prediction"]
+
+STYLE = """
+body { background-color: #0e1117; color: #fafafa; font-family: "Source Sans Pro", sans-serif; margin: 0; }
+nav { background-color: #262730; padding: 12px 24px; }
+nav a { color: #fafafa; margin-right: 20px; text-decoration: none; }
+nav a.current { color: tomato; font-weight: bold; }
+main { max-width: 1400px; margin: 0 auto; padding: 24px; }
+.row { display: flex; gap: 24px; }
+.row > div { min-width: 0; }
+figure { margin: 0; text-align: center; }
+img { max-width: 100%; height: auto; }
+details { border: 1px solid #3d3f4a; border-radius: 6px; padding: 8px 12px; margin: 12px 0; }
+table.dataframe { border-collapse: collapse; font-size: 14px; }
+table.dataframe th, table.dataframe td { border: 1px solid #3d3f4a; padding: 4px 8px; }
+code { background-color: #262730; padding: 1px 4px; border-radius: 4px; }
+"""
+
+
+class _Block:
+    """Container element (column, expander) recording the elements added inside its `with` block."""
+
+    def __init__(self, page, tag_open, tag_close):
+        self.page = page
+        self.tag_open = tag_open
+        self.tag_close = tag_close
+        self.children = []
+
+    def __enter__(self):
+        self.page._stack.append(self.children)
+        return self
+
+    def __exit__(self, *exc):
+        self.page._stack.pop()
+        return False
+
+    def render(self):
+        return self.tag_open + "".join(_render(child) for child in self.children) + self.tag_close
+
+
+class _Row:
+    def __init__(self, columns):
+        self.columns = columns
+
+    def render(self):
+        return '<div class="row">' + "".join(column.render() for column in self.columns) + "</div>"
+
+
+def _render(element):
+    return element if isinstance(element, str) else element.render()
+
+
+class StaticPage:
+    """
+    Stand-in for the `streamlit` module recording a page run as static HTML.
+
+    Only the elements the exported pages use are supported, pages with input
+    widgets stay in the Streamlit app.
+    """
+
+    def __init__(self, name, out_dir):
+        self.name = name
+        self.out_dir = out_dir
+        self.elements = []
+        self._stack = [self.elements]
+        self._figures = 0
+
+    def _add(self, element):
+        self._stack[-1].append(element)
+
+    # caching has no effect, every function runs once per export
+    def cache_data(self, func=None, **kwargs):
+        return func if func is not None else (lambda f: f)
+
+    cache_resource = cache_data
+
+    # text elements
+    def markdown(self, body, unsafe_allow_html=False, **kwargs):
+        body = textwrap.dedent(body)
+        if unsafe_allow_html and body.lstrip().startswith("<"):
+            self._add(body)
+        else:
+            self._add(markdown.markdown(body, extensions=["extra", "sane_lists"], tab_length=2))
+
+    def write(self, *args, **kwargs):
+        for arg in args:
+            self.markdown(str(arg))
+
+    def title(self, body, **kwargs):
+        self._add(f"<h1>{html.escape(body)}</h1>")
+
+    def header(self, body, **kwargs):
+        self._add(f"<h2>{html.escape(body)}</h2>")
+
+    def subheader(self, body, **kwargs):
+        self._add(f"<h3>{html.escape(body)}</h3>")
+
+    # media and data elements
+    def image(self, image, caption=None, width=None, **kwargs):
+        if isinstance(image, bytes):
+            # optimized variants from assets.image_bytes, stored under their content hash
+            extension = "png" if image.startswith(b"\x89PNG") else "jpg"
+            path = f"media/{hashlib.sha256(image).hexdigest()[:12]}.{extension}"
+            os.makedirs(os.path.join(self.out_dir, "media"), exist_ok=True)
+            with open(os.path.join(self.out_dir, path), "wb") as f:
+                f.write(image)
+        else:
+            path = str(image).replace("\\", "/")
+            target = os.path.join(self.out_dir, path)
+            if os.path.exists(path):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copyfile(path, target)
+            else:
+                print(f"warning: image {path} not found, referenced as is")
+        tag = f'<figure><img src="{html.escape(path)}" alt="{html.escape(caption or "")}">'
+        if caption:
+            tag += f"<figcaption>{html.escape(caption)}</figcaption>"
+        self._add(tag + "</figure>")
+
+    def dataframe(self, data=None, hide_index=None, **kwargs):
+        self._add(data.to_html(index=not hide_index, classes="dataframe", border=0))
+
+    def plotly_chart(self, fig, **kwargs):
+        self._figures += 1
+        figure_name = f"{self.name}-{self._figures}"
+        # the figure as JSON too, for clients embedding the charts elsewhere
+        with open(os.path.join(self.out_dir, "figures", figure_name + ".json"), "w", encoding="utf-8") as f:
+            f.write(fig.to_json())
+        self._add(fig.to_html(full_html=False, include_plotlyjs=False, div_id=figure_name))
+
+    # layout elements
+    def columns(self, spec, **kwargs):
+        weights = [1] * spec if isinstance(spec, int) else list(spec)
+        columns = [_Block(self, f'<div style="flex: {weight}">', "</div>") for weight in weights]
+        self._add(_Row(columns))
+        return columns
+
+    def expander(self, label, expanded=False, **kwargs):
+        block = _Block(self, f"<details{' open' if expanded else ''}><summary>{html.escape(label)}</summary>", "</details>")
+        self._add(block)
+        return block
+
+    def render(self):
+        return "".join(_render(element) for element in self.elements)
+
+
+def render_page(name, module_name, function_name, out_dir):
+    """Run one page function with the `streamlit` module swapped for a StaticPage recorder."""
+    page = StaticPage(name, out_dir)
+    module = importlib.import_module(module_name)
+    module.st = page
+    try:
+        getattr(module, function_name)()
+    finally:
+        module.st = streamlit
+    return page.render()
+
+
+def navigation(current, app_url):
+    links = [f'<a href="{name}.html"{" class=current" if name == current else ""}>{html.escape(title)}</a>' for name, title, _, _ in PAGES]
+    if app_url:
+        links += [f'<a href="{html.escape(app_url)}">{html.escape(title)}</a>' for title in APP_PAGES]
+    return "<nav>" + "".join(links) + "</nav>"
+
+
+def export(out_dir="static_site", app_url=None):
+    os.makedirs(os.path.join(out_dir, "figures"), exist_ok=True)
+    # plotly.js is written once and shared by every page, so the bundle works offline
+    with open(os.path.join(out_dir, "plotly.min.js"), "w", encoding="utf-8") as f:
+        f.write(get_plotlyjs())
+
+    for name, title, module_name, function_name in PAGES:
+        body = render_page(name, module_name, function_name, out_dir)
+        document = (
+            '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+            '<meta name="viewport" content="width=device-width, initial-scale=1">'
+            f"<title>{html.escape(title)} - Bike sharing analysis</title>"
+            f'<style>{STYLE}</style><script src="plotly.min.js"></script></head>'
+            f"<body>{navigation(name, app_url)}<main>{body}</main></body></html>"
+        )
+        with open(os.path.join(out_dir, name + ".html"), "w", encoding="utf-8") as f:
+            f.write(document)
+        print(f"exported {title} to {os.path.join(out_dir, name + '.html')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the analysis pages of the bike sharing app as a static bundle.")
+    parser.add_argument("--out", default="static_site", help="output directory of the bundle")
+    parser.add_argument("--app-url", default=None, help="URL of the Streamlit app serving the prediction page, linked from the navigation")
+    args = parser.parse_args()
+    export(args.out, args.app_url)
+
+
+if __name__ == '__main__':
+    main()
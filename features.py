@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+from assets import image_bytes
 
 # Set page configuration
 #st.set_page_config(page_title="Bike Sharing Analysis in Washington DC", layout="wide", page_icon="🚲")
@@ -152,7 +153,7 @@ def main_feature_engineering():
     st.markdown('''Below a walkthrough of Pycaret set up. ''')
 
     with st.expander('Snapshot of our Pycaret Set Up'):
-      st.image("media\\pycaret.png")
+      st.image(image_bytes("pycaret.png"))
     
     st.markdown('''
                 Our ML framework was designed to be intuitive and graspable. Our core approach involved using PyCarret to analyze a variety of various regression models, ranging from tree based regressors to classic linear regression. 
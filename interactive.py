@@ -1,15 +1,90 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from timeindex import load_indexed, date_slice, date_range
+from persistent_cache import get_cache, namespace
+from sql_backend import get_database, drilldown, DIMENSIONS, MEASURES
+
+# Mapping dictionaries for readable axis labels
+season_names = {1: 'Winter', 2: 'Spring', 3: 'Summer', 4: 'Fall'}
+month_names = {1: "Jan", 2: "Feb", 3: "Mar", 4: "Apr", 5: "May", 6: "Jun", 7: "Jul", 8: "Aug", 9: "Sep", 10: "Oct", 11: "Nov", 12: "Dec"}
+
+def load_dashboard_data(data_path="bikes_data_viz.csv"):
+    """Time indexed visualization data with readable labels, kept in the on-disk cache."""
+    def preprocess():
+        data = load_indexed(data_path)
+        # Data preprocessing
+        year_mapping = {0: "2011", 1: "2012"}
+        data['yr'] = data['yr'].map(year_mapping)
+        data['holiday'] = data['holiday'].replace({0: "No", 1: "Yes"})
+        data['workingday'] = data['workingday'].replace({0: "No", 1: "Yes"})
+        return data
+
+    return get_cache().get_or_compute(namespace(data_path), "dashboard_data", preprocess)
+
+def filter_dashboard_data(data, year_selection="All Years", first_day=None, last_day=None):
+    if year_selection != "All Years":
+        data = data[data['yr'] == year_selection]
+    return date_slice(data, first_day, last_day)
+
+def dashboard_aggregates(data_path="bikes_data_viz.csv", year_selection="All Years", first_day=None, last_day=None):
+    """
+    Groupby aggregates behind the dashboard charts for one selection of filters.
+
+    Aggregates are kept in the on-disk cache, keyed by the filters and namespaced by the dataset hash.
+    """
+    def aggregate():
+        data = filter_dashboard_data(load_dashboard_data(data_path), year_selection, first_day, last_day)
+        yearly_data = data.groupby(['yr']).agg(total_casual=('casual', 'sum'), total_registered=('registered', 'sum')).reset_index()
+        seasonal_data = data.groupby(['season']).agg(total_casual=('casual', 'sum'), total_registered=('registered', 'sum')).reset_index()
+        seasonal_data['season_name'] = seasonal_data['season'].map(season_names)
+        monthly_data = data.groupby(['yr', 'mnth']).agg(total_casual=('casual', 'sum'), total_registered=('registered', 'sum')).reset_index()
+        monthly_data['month_name'] = monthly_data['mnth'].map(month_names)
+        daily_data = data.groupby(['weekday']).agg(total_casual=('casual', 'sum'), total_registered=('registered', 'sum')).reset_index()
+        hour_data = data.groupby(['hr', 'season']).agg(total_bikes=('cnt', 'sum'), avg_bikes=('cnt', 'mean')).reset_index()
+        hour_data['season'] = hour_data['season'].map(season_names)
+        workingday_avg = data.groupby('workingday').agg(avg_bikes=('cnt', 'mean')).reset_index()
+        holiday_avg = data.groupby('holiday').agg(avg_bikes=('cnt', 'mean')).reset_index()
+        humidity_avg = data.groupby('Hum').agg(avg_bikes=('cnt', 'mean')).reset_index()
+        weathersit_avg = data.groupby('weathersit').agg(avg_bikes=('cnt', 'mean')).reset_index()
+        return {
+            'yearly_data': yearly_data,
+            'seasonal_data': seasonal_data,
+            'monthly_data': monthly_data,
+            'daily_data': daily_data,
+            'hour_data': hour_data,
+            'workingday_avg': workingday_avg,
+            'holiday_avg': holiday_avg,
+            'humidity_avg': humidity_avg,
+            'weathersit_avg': weathersit_avg,
+        }
+
+    key = ("dashboard_aggregates", year_selection, str(first_day), str(last_day))
+    return get_cache().get_or_compute(namespace(data_path), key, aggregate)
+
+def temperature_scatter(data):
+    """Scatter of the hourly demand against the temperature, colored by season."""
+    # season as a discrete color without mutating the session copy of the data
+    fig = px.scatter(data, x="temp", y="cnt", color=data["season"].astype(str), title="Temperature vs Total Bikes Rented by Season",
+                     labels={'temp': 'Temperature', 'cnt': 'Total Bikes'}, color_discrete_sequence=["darkred", "tomato", "red", "salmon"])
+    fig.update_traces(marker=dict(size=5))
+    return fig
 
 def bike_rental_dashboard(data_path="bikes_data_viz.csv"):
     # Load the data
     @st.cache_data
-    def load_data():
-        return pd.read_csv(data_path)
+    def load_data(path):
+        return load_dashboard_data(path)
+
+    @st.cache_resource
+    def load_database(path):
+        return get_database(path)
+
+    @st.cache_data
+    def load_aggregates(path, year_selection, first_day, last_day):
+        return dashboard_aggregates(path, year_selection, first_day, last_day)
 
-    data = load_data()
+    data = load_data(data_path)
     
     # Title and description
     html_temp = """
@@ -21,25 +96,21 @@ def bike_rental_dashboard(data_path="bikes_data_viz.csv"):
 
     st.markdown("Explore bike rental data with interactive visualizations for each column, including total counts, averages, occupancy rates, and more.")
     
-    # Data preprocessing
-    year_mapping = {0: "2011", 1: "2012"}
-    data['yr'] = data['yr'].map(year_mapping)
-    data['holiday'] = data['holiday'].replace({0: "No", 1: "Yes"})
-    data['workingday'] = data['workingday'].replace({0: "No", 1: "Yes"})
-    
     # Year Filter
     year_selection = st.selectbox("Select Year", ["All Years"] + sorted(data['yr'].unique()), index=0)
-    if year_selection != "All Years":
-        data = data[data['yr'] == year_selection]
-    
-    # Mapping dictionaries for readable axis labels
-    season_names = {1: 'Winter', 2: 'Spring', 3: 'Summer', 4: 'Fall'}
-    month_names = {1: "Jan", 2: "Feb", 3: "Mar", 4: "Apr", 5: "May", 6: "Jun", 7: "Jul", 8: "Aug", 9: "Sep", 10: "Oct", 11: "Nov", 12: "Dec"}
+    data = filter_dashboard_data(data, year_selection)
+
+    # Date Range Filter, sliced by binary search on the hourly time index
+    data_first, data_last = date_range(data)
+    date_selection = st.date_input("Select Date Range", value=(data_first, data_last), min_value=data_first, max_value=data_last, format="YYYY-MM-DD")
+    first_day, last_day = date_selection if len(date_selection) == 2 else (date_selection[0], date_selection[0])
+    data = date_slice(data, first_day, last_day)
+    aggregates = load_aggregates(data_path, year_selection, first_day, last_day)
     
     # Yearly Casual vs Registered
     col1, col2 = st.columns(2)
     with col1:
-        yearly_data = data.groupby(['yr']).agg(total_casual=('casual', 'sum'), total_registered=('registered', 'sum')).reset_index()
+        yearly_data = aggregates['yearly_data']
         fig = go.Figure(data=[
             go.Bar(name='Casual', x=yearly_data['yr'], y=yearly_data['total_casual'], marker_color="darkred"),
             go.Bar(name='Registered', x=yearly_data['yr'], y=yearly_data['total_registered'], marker_color="tomato")
@@ -48,8 +119,7 @@ def bike_rental_dashboard(data_path="bikes_data_viz.csv"):
         st.plotly_chart(fig)
         st.markdown("**Yearly Total Count of Bikes Rented (Casual vs Registered):** This stacked bar chart shows yearly rentals, separated by casual and registered users, indicating user type trends.")
     with col2:
-        seasonal_data = data.groupby(['season']).agg(total_casual=('casual', 'sum'), total_registered=('registered', 'sum')).reset_index()
-        seasonal_data['season_name'] = seasonal_data['season'].map(season_names)
+        seasonal_data = aggregates['seasonal_data']
         fig = go.Figure(data=[
             go.Bar(name='Casual', x=seasonal_data['season_name'], y=seasonal_data['total_casual'], marker_color="darkred"),
             go.Bar(name='Registered', x=seasonal_data['season_name'], y=seasonal_data['total_registered'], marker_color="tomato")
@@ -61,8 +131,7 @@ def bike_rental_dashboard(data_path="bikes_data_viz.csv"):
     # Monthly Casual vs Registered Rentals
     col1, col2 = st.columns(2)
     with col1:
-        monthly_data = data.groupby(['yr', 'mnth']).agg(total_casual=('casual', 'sum'), total_registered=('registered', 'sum')).reset_index()
-        monthly_data['month_name'] = monthly_data['mnth'].map(month_names)
+        monthly_data = aggregates['monthly_data']
         fig = go.Figure(data=[
             go.Bar(name='Casual', x=monthly_data['month_name'], y=monthly_data['total_casual'], marker_color="darkred"),
             go.Bar(name='Registered', x=monthly_data['month_name'], y=monthly_data['total_registered'], marker_color="tomato")
@@ -71,7 +140,7 @@ def bike_rental_dashboard(data_path="bikes_data_viz.csv"):
         st.plotly_chart(fig)
         st.markdown("**Monthly Total Count of Bikes Rented (Casual vs Registered):** Monthly rentals split by casual and registered users, indicating monthly demand trends.")
     with col2:
-        daily_data = data.groupby(['weekday']).agg(total_casual=('casual', 'sum'), total_registered=('registered', 'sum')).reset_index()
+        daily_data = aggregates['daily_data']
         fig = go.Figure(data=[
             go.Bar(name='Casual', x=daily_data['weekday'], y=daily_data['total_casual'], marker_color="darkred"),
             go.Bar(name='Registered', x=daily_data['weekday'], y=daily_data['total_registered'], marker_color="tomato")
@@ -81,8 +150,7 @@ def bike_rental_dashboard(data_path="bikes_data_viz.csv"):
         st.markdown("**Daily Total Count of Bikes Rented (Casual vs Registered):** Daily rental counts separated by casual and registered users, showing demand across the week.")
     
     # Hourly Rentals by Season
-    hour_data = data.groupby(['hr', 'season']).agg(total_bikes=('cnt', 'sum'), avg_bikes=('cnt', 'mean')).reset_index()
-    hour_data['season'] = hour_data['season'].map(season_names)
+    hour_data = aggregates['hour_data']
     fig = px.line(hour_data, x='hr', y='total_bikes', color='season', title="Total Bikes Rented per Hour with Season Split",
                   labels={'hr': 'Hour of Day', 'total_bikes': 'Total Bikes'}, color_discrete_sequence=["firebrick", "tomato", "salmon", "darkred"])
     fig.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", font=dict(color="white"))
@@ -92,14 +160,14 @@ def bike_rental_dashboard(data_path="bikes_data_viz.csv"):
     # Additional Visualizations 
     col1, col2 = st.columns(2)
     with col1:
-        workingday_avg = data.groupby('workingday').agg(avg_bikes=('cnt', 'mean')).reset_index()
+        workingday_avg = aggregates['workingday_avg']
         fig = px.bar(workingday_avg, x="workingday", y="avg_bikes", title="Average Bikes Rented on Working Days vs Non-Working Days",
                      labels={'workingday': 'Working Day', 'avg_bikes': 'Average Bikes'})
         fig.update_traces(marker_color="tomato")
         st.plotly_chart(fig)
         st.markdown("**Average Bikes Rented on Working Days vs Non-Working Days:** Average bike rentals on working vs. non-working days.")
     with col2:
-        holiday_avg = data.groupby('holiday').agg(avg_bikes=('cnt', 'mean')).reset_index()
+        holiday_avg = aggregates['holiday_avg']
         fig = px.bar(holiday_avg, x="holiday", y="avg_bikes", title="Average Bikes Rented on Holidays vs Non-Holidays",
                      labels={'holiday': 'Holiday', 'avg_bikes': 'Average Bikes'})
         fig.update_traces(marker_color="tomato")
@@ -109,26 +177,47 @@ def bike_rental_dashboard(data_path="bikes_data_viz.csv"):
     # Average Counts for Humidity and Weather Situation
     col1, col2 = st.columns(2)
     with col1:
-        humidity_avg = data.groupby('Hum').agg(avg_bikes=('cnt', 'mean')).reset_index()
+        humidity_avg = aggregates['humidity_avg']
         fig = px.bar(humidity_avg, x="Hum", y="avg_bikes", title="Average Bikes Rented by Humidity Level", labels={'Hum': 'Humidity', 'avg_bikes': 'Average Bikes'})
         fig.update_traces(marker_color="tomato")
         st.plotly_chart(fig)
         st.markdown("*Average Bikes Rented by Humidity Level:* Average bike rentals across humidity levels.")
 
     with col2:
-        weathersit_avg = data.groupby('weathersit').agg(avg_bikes=('cnt', 'mean')).reset_index()
+        weathersit_avg = aggregates['weathersit_avg']
         fig = px.bar(weathersit_avg, x="weathersit", y="avg_bikes", title="Average Bikes Rented by Weather Situation", labels={'weathersit': 'Weather Situation', 'avg_bikes': 'Average Bikes'})
         fig.update_traces(marker_color="tomato")
         st.plotly_chart(fig)
         st.markdown("*Average Bikes Rented by Weather Situation:* Average rentals across different weather situations.")
 
-    data["season"] = data["season"].astype(str)
     # Temperature Scatter Plot
-    fig = px.scatter(data, x="temp", y="cnt", color="season", title="Temperature vs Total Bikes Rented by Season",
-                     labels={'temp': 'Temperature', 'cnt': 'Total Bikes'}, color_discrete_sequence=["darkred", "tomato", "red", "salmon"])
-    fig.update_traces(marker=dict(size=5))
-    st.plotly_chart(fig)
+    st.plotly_chart(temperature_scatter(data))
     st.markdown("**Temperature vs Total Bikes Rented by Season:** This scatter plot shows the relationship between temperature and bike rentals, split by season, illustrating how warmer weather influences bike demand.")
 
+    # Custom Drill-Down, filters and group-bys run in the embedded SQL database
+    st.header("Custom Drill-Down")
+    st.markdown("Combine any filters with any group-by dimensions, within the date range selected above. Leave a filter empty to keep all its values.")
+    database = load_database(data_path)
+    drill_filters = {}
+    filter_labels = {'season': 'Season', 'mnth': 'Month', 'weathersit': 'Weather Situation', 'Hum': 'Humidity', 'Wind': 'Wind', 'Rush': 'Rush Hour', 'workingday': 'Working Day'}
+    value_labels = {'season': season_names, 'mnth': month_names, 'workingday': {0: "No", 1: "Yes"}}
+    filter_cols = st.columns(4)
+    for i, (column, label) in enumerate(filter_labels.items()):
+        with filter_cols[i % 4]:
+            drill_filters[column] = st.multiselect(label, database.values(column), format_func=lambda value, column=column: str(value_labels.get(column, {}).get(value, value)))
+    group_by = st.multiselect("Group By", DIMENSIONS, default=["hr"])
+    measure = st.selectbox("Measure", list(MEASURES), index=list(MEASURES).index("total_bikes"))
+
+    drill_data = drilldown(drill_filters, group_by, first_day, last_day, data_path)
+    if group_by and not drill_data.empty:
+        if len(group_by) > 1:
+            fig = px.bar(drill_data, x=group_by[0], y=measure, color=drill_data[group_by[1]].astype(str), title=f"{measure} by {', '.join(group_by)}",
+                         labels={'color': group_by[1]}, color_discrete_sequence=["darkred", "tomato", "firebrick", "salmon", "red"])
+        else:
+            fig = px.bar(drill_data, x=group_by[0], y=measure, title=f"{measure} by {group_by[0]}")
+            fig.update_traces(marker_color="tomato")
+        st.plotly_chart(fig)
+    st.dataframe(drill_data, hide_index=True)
+
 if __name__ == '__main__':
     bike_rental_dashboard()
\ No newline at end of file
@@ -0,0 +1,349 @@
+#LOAD TEST
+"""
+Local load test: N simulated visitors navigate the app pages and submit the
+prediction form in parallel, with random think times between reruns.
+
+    python loadtest.py --sessions 1 5 10 20 --duration 60 --think 2
+    python loadtest.py --url http://localhost:8501 --sessions 5
+
+The app is started with `streamlit run bike_app_mainpage.py` (unless --url points
+to a running one) and every visitor is a websocket client speaking the browser
+protocol, so each rerun goes through the st.navigation entry script in the
+server process and shares its st.cache_data / st.cache_resource with the other
+sessions. Sessions stay connected from one stage to the next, like visitors
+keeping their tab open, so the server RSS shows how memory grows with the
+number of sessions.
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+import datetime as dt
+import numpy as np
+from tornado.websocket import websocket_connect
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+APP = "bike_app_mainpage.py"
+
+# Pages of the app navigation: title -> share of the visits
+PAGES = {
+    "🏠Main Page": 0.25,
+    "📊Data Visualization": 0.20,
+    "🗃️Technical Annex": 0.10,
+    "🧪Results": 0.10,
+    "📈Business Insights": 0.10,
+    "🚲Bike Prediction": 0.25,
+}
+
+PREDICTION_PAGE = "🚲Bike Prediction"
+PREDICTION_SUBMIT = "🚲Bike Prediction (submit)"
+CONNECT = "(new session)"
+
+# widgets of the prediction form the visitors fill in, the select boxes keep their default
+FORM_WIDGETS = ("date_input", "time_input", "slider", "button")
+
+
+class Session:
+    """One simulated visitor, a websocket connection to the app like a browser tab."""
+
+    def __init__(self, url, seed, timeout):
+        self.url = url
+        self.random = random.Random(seed)
+        self.timeout = timeout
+        self.connection = None
+        self.pages = {}
+        self.page = None
+        self.widgets = {}
+
+    async def connect(self):
+        """Open the connection and run the default page, like a first visit."""
+        self.close()
+        self.connection = await websocket_connect(self.url.replace("http", "ws", 1) + "/_stcore/stream", subprotocols=["streamlit"])
+        await self._rerun()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    async def _rerun(self, page_script_hash="", widgets=()):
+        msg = BackMsg()
+        msg.rerun_script.SetInParent()
+        msg.rerun_script.page_script_hash = page_script_hash
+        msg.rerun_script.widget_states.widgets.extend(widgets)
+        await self.connection.write_message(msg.SerializeToString(), binary=True)
+        await asyncio.wait_for(self._read_run(), self.timeout)
+
+    async def _read_run(self):
+        # messages of one script run, until the server reports its end
+        widgets, errors = {}, []
+        while True:
+            data = await self.connection.read_message()
+            if data is None:
+                raise RuntimeError("connection closed by the server")
+            msg = ForwardMsg()
+            msg.ParseFromString(data)
+            kind = msg.WhichOneof("type")
+            if kind == "navigation":
+                self.pages = {page.page_name: page.page_script_hash for page in msg.navigation.app_pages}
+                self.page = next((title for title, page_hash in self.pages.items() if page_hash == msg.navigation.page_script_hash), None)
+            elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type == "exception":
+                    errors.append(f"{element.exception.type}: {element.exception.message}")
+                elif element_type in FORM_WIDGETS:
+                    widgets.setdefault(element_type, []).append(getattr(element, element_type).id)
+            elif kind == "page_not_found":
+                errors.append(f"page not found: {msg.page_not_found.page_name}")
+            elif kind == "session_event" and msg.session_event.WhichOneof("type") == "script_compilation_exception":
+                errors.append(f"compilation error: {msg.session_event.script_compilation_exception.message}")
+            elif kind == "script_finished" and msg.script_finished in (ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_WITH_COMPILE_ERROR):
+                break
+        self.widgets = widgets
+        if errors:
+            raise RuntimeError(f"{self.page}: {errors[0]}")
+
+    async def navigate(self, title):
+        """Rerun after a click on a page of the navigation."""
+        await self._rerun(self.pages[title])
+
+    async def submit_prediction(self):
+        """Fill the prediction form with random answers and click Predict."""
+        if self.page != PREDICTION_PAGE:
+            await self.navigate(PREDICTION_PAGE)
+        day = dt.date.today() + dt.timedelta(days=self.random.randint(0, 30))
+        date = WidgetState(id=self.widgets['date_input'][0])
+        date.string_array_value.data.append(day.strftime("%Y/%m/%d"))
+        hour = WidgetState(id=self.widgets['time_input'][0], string_value=f"{self.random.randint(0, 23):02d}:00")
+        temp = WidgetState(id=self.widgets['slider'][0])
+        temp.double_array_value.data.append(self.random.randint(-5, 35))
+        click = WidgetState(id=self.widgets['button'][0], trigger_value=True)
+        await self._rerun(self.pages[PREDICTION_PAGE], [date, hour, temp, click])
+
+    def next_action(self):
+        if self.connection is None:
+            return CONNECT, self.connect
+        titles = list(PAGES)
+        title = self.random.choices(titles, weights=[PAGES[t] for t in titles])[0]
+        if title == PREDICTION_PAGE and self.page == PREDICTION_PAGE and self.random.random() < 0.7:
+            return PREDICTION_SUBMIT, self.submit_prediction
+        return title, lambda: self.navigate(title)
+
+
+class Server:
+    """`streamlit run` of the app in a child process, its output kept in a log file."""
+
+    def __init__(self, env=None):
+        with socket.socket() as s:
+            s.bind(("localhost", 0))
+            self.port = s.getsockname()[1]
+        self.url = f"http://localhost:{self.port}"
+        self.log = tempfile.NamedTemporaryFile(prefix="bikes-loadtest-", suffix=".log", delete=False)
+        command = [sys.executable, "-m", "streamlit", "run", APP, "--server.headless", "true",
+                   "--server.port", str(self.port), "--browser.gatherUsageStats", "false"]
+        self.process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=self.log, stderr=subprocess.STDOUT)
+
+    def wait_ready(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"streamlit exited with {self.process.returncode}, see {self.log.name}")
+            try:
+                with urllib.request.urlopen(self.url + "/_stcore/health", timeout=2) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                time.sleep(0.5)
+        raise RuntimeError(f"streamlit not ready after {timeout}s, see {self.log.name}")
+
+    def tracebacks(self):
+        """Number of tracebacks the server logged so far (script runner threads included)."""
+        with open(self.log.name, errors="replace") as f:
+            return f.read().count("Traceback (most recent call last)")
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def rss_mib(pid):
+    """Resident set size of a process, None when it can not be read."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        pass
+    try:
+        return int(subprocess.run(["ps", "-o", "rss=", "-p", str(pid)], capture_output=True, text=True).stdout) / 1024
+    except (OSError, ValueError):
+        return None
+
+
+async def run_stage(sessions, duration, think):
+    """
+    Drive every session concurrently for `duration` seconds.
+
+    Reruns started before the deadline run to completion, so the stage can last
+    longer than `duration`. A session whose rerun failed reconnects on its next action.
+
+    Returns:
+        tuple: (latencies by action, errors, elapsed seconds until the last rerun ended).
+    """
+    latencies = {}
+    errors = []
+    started = time.perf_counter()
+    deadline = started + duration
+
+    async def visit(session):
+        while time.perf_counter() < deadline:
+            name, action = session.next_action()
+            start = time.perf_counter()
+            try:
+                await action()
+            except Exception as error:
+                errors.append(f"{name}: {type(error).__name__}: {error}")
+                # the rest of a failed or timed out run would be read as the next one
+                session.close()
+                continue
+            latencies.setdefault(name, []).append(time.perf_counter() - start)
+            # think time before the next click, exponential around the mean
+            if think > 0:
+                await asyncio.sleep(max(0, min(session.random.expovariate(1 / think), deadline - time.perf_counter())))
+
+    await asyncio.gather(*(visit(session) for session in sessions))
+    return latencies, errors, time.perf_counter() - started
+
+
+def summarize(n_sessions, latencies, errors, elapsed, rss_before, rss_after):
+    actions = sum(len(times) for times in latencies.values())
+    return {
+        'sessions': n_sessions,
+        'actions': actions,
+        'errors': len(errors),
+        'elapsed_s': elapsed,
+        'throughput_per_s': actions / elapsed,
+        'rss_before_mib': rss_before,
+        'rss_after_mib': rss_after,
+        'rss_growth_mib': rss_after - rss_before if None not in (rss_before, rss_after) else None,
+        'pages': {
+            name: {
+                'count': len(times),
+                'p50_ms': float(np.percentile(times, 50) * 1000),
+                'p95_ms': float(np.percentile(times, 95) * 1000),
+                'p99_ms': float(np.percentile(times, 99) * 1000),
+                'max_ms': max(times) * 1000,
+            }
+            for name, times in sorted(latencies.items())
+        },
+    }
+
+
+def print_stage(stage):
+    rss = "RSS unknown" if stage['rss_growth_mib'] is None else \
+        f"RSS {stage['rss_before_mib']:.0f} -> {stage['rss_after_mib']:.0f} MiB ({stage['rss_growth_mib']:+.0f})"
+    print(f"\n{stage['sessions']} sessions: {stage['actions']} reruns in {stage['elapsed_s']:.0f}s, {stage['throughput_per_s']:.2f}/s, "
+          f"{stage['errors']} errors, {rss}")
+    for name, page in stage['pages'].items():
+        print(f"  {name:30s} n={page['count']:5d}  p50 {page['p50_ms']:8.0f} ms  p95 {page['p95_ms']:8.0f} ms  p99 {page['p99_ms']:8.0f} ms")
+
+
+def print_memory(rows):
+    print("\nRetained memory by page (all sessions)")
+    for page in PAGES:
+        page_rows = [row for row in rows if row['page'] == page]
+        if not page_rows:
+            continue
+        reruns = sum(row['reruns'] for row in page_rows)
+        retained = sum(row['retained_kib_total'] for row in page_rows)
+        alerts = sum(row['alert'] is not None for row in page_rows)
+        print(f"  {page:30s} reruns={reruns:5d}  retained {retained:10.0f} KiB  {retained / reruns:8.1f} KiB/rerun  leak alerts in {alerts} session(s)")
+
+
+async def run(args, url, server=None):
+    sessions = []
+    pid = server.process.pid if server is not None else args.pid
+    report = {'started': dt.datetime.now().isoformat(timespec='seconds'), 'url': url, 'rss_start_mib': rss_mib(pid) if pid else None, 'stages': []}
+    try:
+        for n_sessions in args.sessions:
+            while len(sessions) < n_sessions:
+                sessions.append(Session(url, args.seed + len(sessions), args.timeout))
+            rss_before = rss_mib(pid) if pid else None
+            tracebacks_before = server.tracebacks() if server is not None else 0
+            latencies, errors, elapsed = await run_stage(sessions[:n_sessions], args.duration, args.think)
+            stage = summarize(n_sessions, latencies, errors, elapsed, rss_before, rss_mib(pid) if pid else None)
+            if server is not None:
+                # failures the server only logged (e.g. in a script runner thread), uncaught page exceptions are logged too
+                stage['server_tracebacks'] = server.tracebacks() - tracebacks_before
+            report['stages'].append(stage)
+            print_stage(stage)
+            for error in errors[:5]:
+                print(f"  error: {error}")
+            if stage.get('server_tracebacks'):
+                print(f"  {stage['server_tracebacks']} traceback(s) in the server log {server.log.name}")
+    finally:
+        for session in sessions:
+            session.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent sessions of the bike sharing app.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 20], help="number of concurrent sessions of each stage")
+    parser.add_argument("--duration", type=float, default=60, help="length of each stage in seconds")
+    parser.add_argument("--think", type=float, default=2, help="mean think time between two reruns of a session, in seconds")
+    parser.add_argument("--timeout", type=float, default=300, help="timeout of a single rerun in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the simulated visitors")
+    parser.add_argument("--url", default=None, help="app already running at this URL instead of starting one")
+    parser.add_argument("--pid", type=int, default=None, help="process id of the app given with --url, to follow its RSS")
+    parser.add_argument("--memwatch", action="store_true", help="account the memory retained by every page rerun (slower reruns)")
+    parser.add_argument("--out", default=None, help="JSON file to write the report to")
+    args = parser.parse_args()
+    if args.memwatch and args.url:
+        parser.error("--memwatch needs the app started by the load test")
+
+    server = None
+    memwatch_report = None
+    if args.url is None:
+        env = dict(os.environ)
+        if args.memwatch:
+            memwatch_report = os.path.join(tempfile.mkdtemp(prefix="bikes-memwatch-"), "report.json")
+            env.update(BIKES_MEMWATCH="1", BIKES_MEMWATCH_REPORT=memwatch_report)
+        server = Server(env)
+    try:
+        if server is not None:
+            server.wait_ready()
+        report = asyncio.run(run(args, args.url or server.url, server))
+    finally:
+        if server is not None:
+            server.stop()
+
+    if memwatch_report is not None:
+        # written by the app when it exits (see memwatch.py)
+        try:
+            with open(memwatch_report) as f:
+                report['memory'] = json.load(f)
+            print_memory(report['memory'])
+        except (OSError, ValueError):
+            print(f"no memory report written by the app, see {server.log.name}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+#MEMORY WATCH
+"""
+Per-session, per-page memory accounting around page reruns, to catch leaks
+(e.g. matplotlib figures never closed) before they take down a process.
+
+Enable it with BIKES_MEMWATCH=1 (and BIKES_MEMWATCH_REPORT=<file> to get the
+report as JSON when the process exits): every page run is then measured with the
+traced memory counter of tracemalloc, which slows the app down a little. Only
+when a page keeps growing are snapshots taken, to log the allocations behind
+it. Allocation deltas are process wide, so they are only exact when reruns do
+not overlap.
+"""
+import gc
+import os
+import sys
+import json
+import time
+import atexit
+import logging
+import threading
+import contextlib
+import tracemalloc
+from collections import deque
+
+ENABLED = os.environ.get("BIKES_MEMWATCH", "0") == "1"
+REPORT_PATH = os.environ.get("BIKES_MEMWATCH_REPORT")
+
+# a page leaks when each of its last GROWTH_RERUNS reruns retained memory, GROWTH_KIB in total
+GROWTH_RERUNS = int(os.environ.get("BIKES_MEMWATCH_RERUNS", 3))
+GROWTH_KIB = int(os.environ.get("BIKES_MEMWATCH_GROWTH_KIB", 512))
+
+# sessions without a rerun for this long are considered ended and forgotten
+SESSION_TTL_S = float(os.environ.get("BIKES_MEMWATCH_SESSION_TTL_S", 3600))
+
+logger = logging.getLogger("memwatch")
+
+_lock = threading.Lock()
+# (session, page) -> last GROWTH_RERUNS runs, running totals, snapshot of the last alert
+_recent = {}
+_totals = {}
+_snapshots = {}
+
+
+def _session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "no-session"
+
+
+def _open_figures():
+    # figures still registered in pyplot are never freed until plt.close
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    return len(pyplot.get_fignums()) if pyplot is not None else 0
+
+
+def leak_alert(history):
+    """Alert message when the last reruns of a page kept growing, None otherwise."""
+    recent = list(history)[-GROWTH_RERUNS:]
+    if len(recent) < GROWTH_RERUNS:
+        return None
+    retained = sum(run['retained_bytes'] for run in recent)
+    if all(run['retained_bytes'] > 0 for run in recent) and retained > GROWTH_KIB * 1024:
+        return f"retained {retained / 1024:.0f} KiB over its last {GROWTH_RERUNS} reruns"
+    if all(run['figures_after'] > run['figures_before'] for run in recent):
+        return f"open matplotlib figures went up to {recent[-1]['figures_after']}, figures are not closed after st.pyplot"
+    return None
+
+
+def _top_allocations(key):
+    # growth since the previous alert of the page, largest holders on the first one;
+    # the snapshot takes long, other sessions keep their accounting meanwhile
+    snapshot = tracemalloc.take_snapshot()
+    with _lock:
+        previous = _snapshots.get(key)
+        if key in _totals:
+            _snapshots[key] = snapshot
+    if previous is None:
+        return [(str(stat.traceback[0]), stat.size) for stat in snapshot.statistics('lineno')[:5]]
+    return [(str(stat.traceback[0]), stat.size_diff) for stat in snapshot.compare_to(previous, 'lineno')[:5] if stat.size_diff > 0]
+
+
+def _expire(now):
+    for key in [key for key, totals in _totals.items() if now - totals['last_run'] > SESSION_TTL_S]:
+        _forget(key)
+
+
+def _forget(key):
+    _recent.pop(key, None)
+    _totals.pop(key, None)
+    _snapshots.pop(key, None)
+
+
+def end_session(session):
+    """Drop the accounting of a session that ended."""
+    with _lock:
+        for key in [key for key in _totals if key[0] == session]:
+            _forget(key)
+
+
+@contextlib.contextmanager
+def watch_page(page, session=None):
+    """
+    Measure what a page run allocates and keeps alive.
+
+    Args:
+        page (str): Page title, as in the navigation.
+        session (str): Session id, defaults to the Streamlit session running the script.
+    """
+    if not ENABLED:
+        yield
+        return
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(10)
+    key = (session or _session_id(), page)
+
+    figures_before = _open_figures()
+    before = tracemalloc.get_traced_memory()[0]
+    try:
+        yield
+    finally:
+        # collect the garbage of the run itself, what is left is kept alive by someone
+        gc.collect()
+        run = {
+            'retained_bytes': tracemalloc.get_traced_memory()[0] - before,
+            'figures_before': figures_before,
+            'figures_after': _open_figures(),
+        }
+        now = time.monotonic()
+        with _lock:
+            _expire(now)
+            recent = _recent.setdefault(key, deque(maxlen=GROWTH_RERUNS))
+            recent.append(run)
+            totals = _totals.setdefault(key, {'reruns': 0, 'retained_bytes': 0, 'alerts': 0})
+            totals['reruns'] += 1
+            totals['retained_bytes'] += run['retained_bytes']
+            totals['last_run'] = now
+            alert = leak_alert(recent)
+            if alert:
+                totals['alerts'] += 1
+        if alert:
+            alert += f", top allocations {_top_allocations(key)}"
+            logger.warning("possible leak in page %r (session %s): %s", page, key[0], alert)
+
+
+def report():
+    """Accounting of every (session, page) watched and still alive, one dict per pair."""
+    with _lock:
+        return [
+            {
+                'session': session,
+                'page': page,
+                'reruns': totals['reruns'],
+                'retained_kib_total': totals['retained_bytes'] / 1024,
+                'retained_kib_last': _recent[session, page][-1]['retained_bytes'] / 1024,
+                'open_pyplot_figures': _recent[session, page][-1]['figures_after'],
+                'alerts': totals['alerts'],
+                'alert': leak_alert(_recent[session, page]),
+            }
+            for (session, page), totals in _totals.items()
+        ]
+
+
+def reset():
+    with _lock:
+        _recent.clear()
+        _totals.clear()
+        _snapshots.clear()
+
+
+def _write_report():
+    with open(REPORT_PATH, "w") as f:
+        json.dump(report(), f, indent=2)
+
+
+if ENABLED and REPORT_PATH:
+    atexit.register(_write_report)
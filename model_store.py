@@ -0,0 +1,76 @@
+#MODEL STORE
+import os
+import json
+import joblib
+
+MODELS_DIR = "models"
+LATEST_FILE = os.path.join(MODELS_DIR, "latest.json")
+
+# model shipped with the app, served until a retrained version is published
+DEFAULT_MODEL = "my_second_bike_model"
+
+
+def latest_model():
+    """Name (path without `.pkl`, as load_model expects it) of the model the app should serve."""
+    try:
+        with open(LATEST_FILE) as f:
+            return json.load(f)['model']
+    except (OSError, ValueError, KeyError):
+        return DEFAULT_MODEL
+
+
+def served_model():
+    """Name of the model answering requests: BIKES_PRIMARY_MODEL when set, the latest published version otherwise."""
+    return os.environ.get("BIKES_PRIMARY_MODEL") or latest_model()
+
+
+def latest_metadata(name=None):
+    """Metadata of a saved version (the latest published one by default), empty for the shipped model."""
+    name = name or latest_model()
+    try:
+        with open(f"{name}.json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def next_version():
+    """Version number following the ones already saved in MODELS_DIR."""
+    versions = [0]
+    if os.path.isdir(MODELS_DIR):
+        for file_name in os.listdir(MODELS_DIR):
+            if file_name.startswith("bike_model-v") and file_name.endswith(".pkl"):
+                versions.append(int(file_name[len("bike_model-v"):].split("-")[0]))
+    return max(versions) + 1
+
+
+def save_version(pipeline, metadata, publish=True, evaluation_pipeline=None):
+    """
+    Write a versioned model artifact and its metadata, and make it the served model.
+
+    Args:
+        pipeline: Fitted pipeline, loadable with pycaret's load_model.
+        metadata (dict): Training parameters and scores, stored next to the artifact.
+        publish (bool): Point the app to this version (picked up on its next start).
+        evaluation_pipeline: Same pipeline fitted without the hours from `metadata['test_from']`,
+            scored on them by the Results page.
+
+    Returns:
+        str: Model name of the new version.
+    """
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    version = next_version()
+    name = os.path.join(MODELS_DIR, f"bike_model-v{version}-{metadata['trained_at'].replace(':', '').replace('-', '')}")
+    joblib.dump(pipeline, f"{name}.pkl")
+    if evaluation_pipeline is not None:
+        joblib.dump(evaluation_pipeline, f"{name}-evaluation.pkl")
+        metadata = dict(metadata, evaluation_model=f"{name}-evaluation")
+    with open(f"{name}.json", "w") as f:
+        json.dump(dict(metadata, version=version, model=name), f, indent=2)
+
+    if publish:
+        # write then rename, a running app never reads a partial pointer
+        with open(f"{LATEST_FILE}.tmp", "w") as f:
+            json.dump({'model': name, 'version': version}, f)
+        os.replace(f"{LATEST_FILE}.tmp", LATEST_FILE)
+    return name
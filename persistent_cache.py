@@ -0,0 +1,154 @@
+#PERSISTENT CACHE
+import os
+import time
+import pickle
+import hashlib
+import sqlite3
+import logging
+import threading
+import functools
+from importlib import metadata
+from model_store import served_model
+
+# Location and size bound of the on-disk cache, can be changed per deployment
+CACHE_PATH = os.environ.get("BIKES_CACHE_PATH", os.path.join(".cache", "bikes_cache.sqlite"))
+MAX_BYTES = int(os.environ.get("BIKES_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Artifacts the cached values depend on
+MODEL_PATH = f"{served_model()}.pkl"
+
+# Bump when the code computing cached values changes, old entries are then never read
+CACHE_VERSION = 1
+
+logger = logging.getLogger("persistent_cache")
+
+
+def _code_version():
+    # cached frames are pickled, a pandas upgrade can make them unreadable or different
+    try:
+        pandas_version = metadata.version("pandas")
+    except metadata.PackageNotFoundError:
+        pandas_version = "none"
+    return f"v{CACHE_VERSION}-pd{pandas_version}"
+
+
+@functools.lru_cache(maxsize=None)
+def _hash_file(path, mtime, size):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def file_hash(path):
+    """Content hash of a file, recomputed only when its modification time or size changes."""
+    stat = os.stat(path)
+    return _hash_file(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def namespace(*paths):
+    """
+    Cache namespace for values derived from the given files (model, datasets).
+
+    A new model or dataset, CACHE_VERSION or pandas version gives a new namespace,
+    so stale entries are never read and are eventually evicted.
+    """
+    return "-".join([_code_version()] + [file_hash(path) for path in paths])
+
+
+class PersistentCache:
+    """
+    Key/value cache stored in a local SQLite file, shared by all sessions and
+    kept across restarts.
+
+    Values are pickled. When the total size goes over `max_bytes`, the least
+    recently used entries are evicted.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, "
+            "size INTEGER NOT NULL, accessed REAL NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+
+    def get(self, namespace, key, default=None):
+        """Cached value of `key` in `namespace`, or `default` when missing or unreadable."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE namespace = ? AND key = ?", (namespace, repr(key))
+            ).fetchone()
+            if row is None:
+                return default
+            self._conn.execute(
+                "UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?", (time.time(), namespace, repr(key))
+            )
+        try:
+            return pickle.loads(row[0])
+        except Exception:
+            # written by other code or library versions, treated as a miss and dropped
+            logger.warning("unreadable cache entry %r in %s, discarded", key, namespace, exc_info=True)
+            with self._lock:
+                self._conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, repr(key)))
+            return default
+
+    def set(self, namespace, key, value):
+        """Store `value` under `key` in `namespace` and evict old entries if needed."""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                (namespace, repr(key), blob, len(blob), time.time()),
+            )
+            self._evict()
+
+    def get_or_compute(self, namespace, key, compute):
+        """Cached value of `key`, computed with `compute()` and stored on a miss."""
+        missing = object()
+        value = self.get(namespace, key, missing)
+        if value is missing:
+            value = compute()
+            self.set(namespace, key, value)
+        return value
+
+    def size(self):
+        """Total size in bytes of the stored values."""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def clear(self, namespace=None):
+        """Remove every entry, or only the entries of one namespace."""
+        with self._lock:
+            if namespace is None:
+                self._conn.execute("DELETE FROM entries")
+            else:
+                self._conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # walk from the least recently used entry until enough space is freed
+        cutoff = None
+        for accessed, size in self._conn.execute("SELECT accessed, size FROM entries ORDER BY accessed").fetchall():
+            total -= size
+            cutoff = accessed
+            if total <= self.max_bytes:
+                break
+        self._conn.execute("DELETE FROM entries WHERE accessed <= ?", (cutoff,))
+
+
+@functools.lru_cache(maxsize=None)
+def get_cache(path=CACHE_PATH, max_bytes=MAX_BYTES):
+    """Process wide cache instance, opened once."""
+    return PersistentCache(path, max_bytes)
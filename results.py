@@ -2,6 +2,55 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 from pycaret.classification import *
+from timeindex import load_indexed, time_slice, time_split, date_slice, date_range
+from persistent_cache import get_cache, namespace, MODEL_PATH
+from model_store import served_model, latest_metadata
+
+def evaluate_model(data_path="bikes_clean_data.csv"):
+    """
+    Chronological train/test split of the cleaned data and the model predictions over the test period.
+
+    Retrained versions are scored with their evaluation model, fitted without the hours
+    from `test_from` of their metadata. The shipped model keeps its 80/20 split.
+    The evaluation is kept in the on-disk cache, namespaced by the model and dataset hashes.
+
+    Returns:
+        tuple: (y_train, y_test, y_pred) series indexed by hourly timestamp.
+    """
+    def evaluate():
+        df = load_indexed(data_path)
+        metadata = latest_metadata(served_model())
+
+        if metadata.get('evaluation_model'):
+            # the served version has seen every hour, its evaluation model has not seen the test ones
+            model = load_model(model_name=metadata['evaluation_model'])
+            train, test = time_slice(df, end=metadata['test_from']), time_slice(df, metadata['test_from'])
+        else:
+            model = load_model(model_name=served_model())
+            train, test = time_split(df, test_size=0.2)  # 80% / 20%, in chronological order
+        X_test = test.drop("cnt", axis=1)
+
+        # Predictions
+        y_pred = model.predict(X_test.drop(columns=["hum", "prev_count", "windspeed", "yr", "atemp"]))
+        return train.cnt, test.cnt, pd.Series(y_pred, index=test.index)
+
+    return get_cache().get_or_compute(namespace(MODEL_PATH, data_path), "evaluation", evaluate)
+
+def model_scores(metadata):
+    """Holdout metrics and cross-validation scores from the metadata of a retrained version."""
+    holdout = metadata['holdout']
+    scores = pd.DataFrame({
+        "Split": ["Holdout"],
+        "Weighted R2": [holdout['weighted_r2']],
+        "R2": [holdout['r2']],
+        "MAE": [holdout['mae']],
+        "RMSE": [holdout['rmse']],
+    })
+    folds = pd.DataFrame({
+        "Split": [f"CV fold {i}" for i in range(len(metadata.get('cv_fold_scores', [])))] + (["CV mean"] if 'cv_weighted_r2' in metadata else []),
+        "Weighted R2": metadata.get('cv_fold_scores', []) + ([metadata['cv_weighted_r2']] if 'cv_weighted_r2' in metadata else []),
+    })
+    return pd.concat([scores, folds], ignore_index=True).round(3)
 
 def main_results(data_path="bikes_clean_data.csv"):
     html_temp = """
@@ -18,64 +67,65 @@ def main_results(data_path="bikes_clean_data.csv"):
 
     col1, col2 = st.columns([2, 5])
 
-    with col1:
-        results_df = pd.DataFrame({
-            "Fold": [0, 1, 2, 3, 4, "Mean", "STDV"],
-            "MAE": [60.07, 29.88, 43.06, 62.77, 97.3, 58.62, 22.73],
-            "MSE": [7540.55, 2565.43, 3993.99, 8120.92, 17779.07, 7999.9, 5318.62],
-            "RMSE": [86.84, 50.65, 63.20, 90.12, 133.34, 84.33, 28.36],
-            "R2": [0.63, 0.89, 0.79, 0.46, 0.59, 0.67, 0.14],
-            "RMSLE": [0.76, 0.45, 0.54, 0.81, 0.73, 0.66, 0.14],
-            "MAPE": [1.08, 0.41, 0.49, 0.82, 0.65, 0.69, 0.24]
-        })
-        st.dataframe(results_df, hide_index=True)
-
-    with col2:
-        st.markdown('''
-        Some insights found with our metrics are: 
-        - Our R^2 value approximates 0.7 (0.6665,0.7259), which indicates that **we capture roughly 70% of the variance of the data via the independent variables**. 
-        - Our weighted R^2 approximates 0.2695, but we cannot say that the value is not 0 with a 95% confidence level. Indicating it is possible our model entirely under predicts, and thus the attempt to train the model to incur errors via overpredicting alone was not achieved. 
-        - A simple solution would be to simply add a bias (X% of the rolling count, for example) which could shift the predictions upwards. However, this would reduce the overall accuracy of the model and thus was not attempted.                
-        - MAE: on average our model predicts +/- 58 bikes
-        - RMSE: on average our model predicts +/- 84 bikes
-        ''')
+    metadata = latest_metadata(served_model())
+    if 'holdout' in metadata:
+        # retrained version, scores recorded by training.py
+        with col1:
+            st.dataframe(model_scores(metadata), hide_index=True)
+        with col2:
+            st.markdown(f'''
+            The model served is version {metadata['version']} ({metadata['mode'].replace('_', ' ')}), trained on the hours until {metadata['trained_until']}.
+            - The holdout scores come from the same model fitted without the hours from {metadata['test_from']}, the period shown in the graphs below.
+            - Weighted R^2 on the holdout hours: {metadata['holdout']['weighted_r2']:.4f}, R^2: {metadata['holdout']['r2']:.4f}
+            - MAE: on average our model predicts +/- {metadata['holdout']['mae']:.0f} bikes
+            - RMSE: on average our model predicts +/- {metadata['holdout']['rmse']:.0f} bikes
+            ''')
+    else:
+        # shipped PyCaret model, scores of its tuning run
+        with col1:
+            results_df = pd.DataFrame({
+                "Fold": [0, 1, 2, 3, 4, "Mean", "STDV"],
+                "MAE": [60.07, 29.88, 43.06, 62.77, 97.3, 58.62, 22.73],
+                "MSE": [7540.55, 2565.43, 3993.99, 8120.92, 17779.07, 7999.9, 5318.62],
+                "RMSE": [86.84, 50.65, 63.20, 90.12, 133.34, 84.33, 28.36],
+                "R2": [0.63, 0.89, 0.79, 0.46, 0.59, 0.67, 0.14],
+                "RMSLE": [0.76, 0.45, 0.54, 0.81, 0.73, 0.66, 0.14],
+                "MAPE": [1.08, 0.41, 0.49, 0.82, 0.65, 0.69, 0.24]
+            })
+            st.dataframe(results_df, hide_index=True)
+
+        with col2:
+            st.markdown('''
+            Some insights found with our metrics are: 
+            - Our R^2 value approximates 0.7 (0.6665,0.7259), which indicates that **we capture roughly 70% of the variance of the data via the independent variables**. 
+            - Our weighted R^2 approximates 0.2695, but we cannot say that the value is not 0 with a 95% confidence level. Indicating it is possible our model entirely under predicts, and thus the attempt to train the model to incur errors via overpredicting alone was not achieved. 
+            - A simple solution would be to simply add a bias (X% of the rolling count, for example) which could shift the predictions upwards. However, this would reduce the overall accuracy of the model and thus was not attempted.                
+            - MAE: on average our model predicts +/- 58 bikes
+            - RMSE: on average our model predicts +/- 84 bikes
+            ''')
 
 #GRAPH1
     st.subheader("Predicted vs Unpredicted values")
 
-    def load_data():
-        return pd.read_csv(data_path)
+    @st.cache_data
+    def load_evaluation(path):
+        return evaluate_model(path)
 
-    df = load_data()
-    df.index = pd.to_datetime(df.index, unit='h')
+    y_train, y_test, y_pred = load_evaluation(data_path)
 
-    model = load_model(model_name='my_second_bike_model')
-    final_model = model
-
-    X = df.drop("cnt", axis=1)
-    y = df.cnt
-
-    y.index = pd.to_datetime(y.index, unit='h')
-
-
-    X_train = X.iloc[:13901, :]  # 80%
-    X_test = X.iloc[-3476:, :]  # 20%
-    y_train = y.iloc[:13901]  # 80%
-    y_test = y.iloc[-3476:]  # 20%
-
-    # Predictions
-    y_pred = model.predict(X_test.drop(columns=["hum", "prev_count", "windspeed", "yr", "atemp"]))
-
-    # Sort data by index to ensure continuity in the line
-    y_test = y_test.sort_index()
-    y_pred = pd.Series(y_pred, index=y_test.index).sort_index()
+    # Date range filter over the test period, sliced by binary search on the time index
+    test_first, test_last = date_range(y_test)
+    selected = st.date_input("Select test period dates", value=(test_first, test_last), min_value=test_first, max_value=test_last, format="YYYY-MM-DD")
+    first_day, last_day = selected if len(selected) == 2 else (selected[0], selected[0])
+    y_test_range = date_slice(y_test, first_day, last_day)
+    y_pred_range = date_slice(y_pred, first_day, last_day)
 
     # Weekly resampling
-    y_test_weekly = y_test.resample('W').sum()
-    y_pred_weekly = y_pred.resample('W').sum()
+    y_test_weekly = y_test_range.resample('W').sum()
+    y_pred_weekly = y_pred_range.resample('W').sum()
 
     # Plotting actual vs. predicted values
-    plt.figure(figsize=(14, 7))
+    fig = plt.figure(figsize=(14, 7))
 
     # Plot actual values as a solid line
     plt.plot(y_test_weekly.index, y_test_weekly, 'ro', label='Actual', color='red', linewidth=1.5)
@@ -89,22 +139,19 @@ def main_results(data_path="bikes_clean_data.csv"):
     plt.legend()
 
     # Use Streamlit to display the plot
-    st.pyplot(plt)
+    st.pyplot(fig)
+    plt.close(fig)
 
 #GRAPH 2 
     st.subheader("Predicted and actual values, aggregated to daily sums")
 
 
-    # Ensure that y_test and y_pred are sorted by index for continuity in the line
-    y_test = y_test.sort_index()
-    y_pred = pd.Series(y_pred, index=y_test.index).sort_index()
-
     # Resampling to daily frequency for smoother visualization (can change to 'W' for weekly)
-    y_test_daily = y_test.resample('D').sum()  # Daily resampling
-    y_pred_daily = y_pred.resample('D').sum()
+    y_test_daily = y_test_range.resample('D').sum()  # Daily resampling
+    y_pred_daily = y_pred_range.resample('D').sum()
 
     # Plotting actual vs predicted daily counts
-    plt.figure(figsize=(12, 6))
+    fig = plt.figure(figsize=(12, 6))
 
     # Plot actual values
     plt.plot(y_test_daily.index, y_test_daily, label='Actual', color='blue', marker='o', linewidth=2)
@@ -141,30 +188,38 @@ def main_results(data_path="bikes_clean_data.csv"):
     )
 
     # Display the plot in Streamlit
-    st.pyplot(plt)
+    st.pyplot(fig)
+    plt.close(fig)
 
 #GRAPH 3
     st.subheader("Predicted and actual values, aggregated to hourly sums")
 
-    hours_range = 50
+    # Hourly window around the train/test split, any range of dates can be selected
+    data_first, data_last = date_range(y_train)[0], date_range(y_test)[1]
+    default_window = (test_first - pd.Timedelta(days=1), test_first + pd.Timedelta(days=1))
+    selected = st.date_input("Select hourly window dates", value=default_window, min_value=data_first, max_value=data_last, format="YYYY-MM-DD")
+    window_first, window_last = selected if len(selected) == 2 else (selected[0], selected[0])
+    y_train_window = date_slice(y_train, window_first, window_last)
+    y_test_window = date_slice(y_test, window_first, window_last)
+    y_pred_window = date_slice(y_pred, window_first, window_last)
 
-    plt.figure(figsize=(12, 6))
+    fig = plt.figure(figsize=(12, 6))
 
     # Plot actual values (train data)
-    plt.plot(y_train.iloc[-hours_range:].index, y_train.iloc[-hours_range:], label='Actual (Train)', color='blue', marker='o', linewidth=2)
+    plt.plot(y_train_window.index, y_train_window, label='Actual (Train)', color='blue', marker='o', linewidth=2)
 
     # Plot predicted values (in-sample)
-    plt.plot(y_pred.iloc[:hours_range].index, y_pred.iloc[:hours_range], label='Predicted (In-Sample)', color='orange', marker='o', linewidth=2)
+    plt.plot(y_pred_window.index, y_pred_window, label='Predicted (In-Sample)', color='orange', marker='o', linewidth=2)
 
     # Plot forecasted values (test data)
-    plt.plot(y_test.iloc[:hours_range].index, y_test.iloc[:hours_range], label='Actual (Test)', color='blue', marker='o', linewidth=2)
+    plt.plot(y_test_window.index, y_test_window, label='Actual (Test)', color='blue', marker='o', linewidth=2)
 
     # Overprediction shading
     plt.fill_between(
-        y_test.iloc[:hours_range].index,
-        y_test.iloc[:hours_range],
-        y_pred.iloc[:hours_range],
-        where=y_pred.iloc[:hours_range] > y_test.iloc[:hours_range],
+        y_test_window.index,
+        y_test_window,
+        y_pred_window,
+        where=y_pred_window > y_test_window,
         color='gray',
         alpha=0.3,
         label='Overprediction'
@@ -172,10 +227,10 @@ def main_results(data_path="bikes_clean_data.csv"):
 
         # Underprediction shading
     plt.fill_between(
-        y_test.iloc[:hours_range].index,
-        y_test.iloc[:hours_range],
-        y_pred.iloc[:hours_range],
-        where=y_pred.iloc[:hours_range] <= y_test.iloc[:hours_range],
+        y_test_window.index,
+        y_test_window,
+        y_pred_window,
+        where=y_pred_window <= y_test_window,
         color='red',
         alpha=0.3,
         label='Underprediction'
@@ -189,7 +244,8 @@ def main_results(data_path="bikes_clean_data.csv"):
     plt.grid(alpha=0.3)
 
         # Display the plot in Streamlit
-    st.pyplot(plt)
+    st.pyplot(fig)
+    plt.close(fig)
 
 
     
@@ -0,0 +1,161 @@
+#MODEL SERVING
+"""
+Score a request batch with several registered models while preprocessing it once.
+
+Models trained from the same PyCaret setup share their preprocessing steps, so the
+feature matrix is built once per group of identical preprocessors and every final
+estimator of the group scores it. The primary model answers the request, shadow
+models are scored in a background thread and their predictions and latencies are
+appended to a JSON lines log, to compare a new model on live traffic:
+
+    BIKES_SHADOW_MODELS=my_bike_model streamlit run bike_app_mainpage.py
+
+Batches waiting for shadow scoring are held in a bounded queue, when the shadow
+models fall behind new batches are dropped instead of piling up in memory.
+"""
+import os
+import json
+import time
+import queue
+import pickle
+import hashlib
+import logging
+import threading
+import datetime as dt
+import numpy as np
+from pycaret.classification import load_model
+from model_store import served_model
+
+PRIMARY_MODEL = served_model()
+SHADOW_MODELS = [name for name in os.environ.get("BIKES_SHADOW_MODELS", "").split(",") if name]
+SHADOW_LOG = os.environ.get("BIKES_SHADOW_LOG", "shadow_predictions.jsonl")
+# batches waiting for shadow scoring, beyond that new batches are dropped
+SHADOW_QUEUE_SIZE = int(os.environ.get("BIKES_SHADOW_QUEUE_SIZE", 32))
+
+# features ignored in the PyCaret setup, the pipelines are fitted without them
+IGNORED_FEATURES = ["hum", "prev_count", "windspeed", "yr", "atemp"]
+
+logger = logging.getLogger("serving")
+
+
+class ModelRegistry:
+    """Loaded models by name, grouped by identical preprocessing steps."""
+
+    def __init__(self):
+        self.models = {}
+        self._groups = {}
+
+    def register(self, name, model=None):
+        """Add a model, loaded from `<name>.pkl` when not given."""
+        if model is None:
+            model = load_model(model_name=name, verbose=False)
+        # fitted preprocessing steps pickle to the same bytes when they come from the same setup
+        fingerprint = hashlib.sha256(pickle.dumps(model.steps[:-1])).hexdigest()
+        self.models[name] = model
+        self._groups[name] = fingerprint
+        return model
+
+    def group(self, name):
+        return self._groups[name]
+
+
+class Scorer:
+    """
+    Primary and shadow scoring of request batches on shared feature matrices.
+
+    Args:
+        registry (ModelRegistry): Models available for scoring.
+        primary (str): Name of the model answering the requests.
+        shadows (list): Names of the models scored in the background.
+        log_path (str): JSON lines file the shadow predictions are appended to.
+        queue_size (int): Batches waiting for shadow scoring before new ones are dropped.
+    """
+
+    def __init__(self, registry, primary, shadows=(), log_path=SHADOW_LOG, queue_size=SHADOW_QUEUE_SIZE):
+        self.registry = registry
+        self.primary = primary
+        self.shadows = [name for name in shadows if name != primary]
+        self.log_path = log_path
+        self.dropped = 0
+        self._queue = None
+        if self.shadows:
+            self._queue = queue.Queue(maxsize=queue_size)
+            threading.Thread(target=self._shadow_worker, name="shadow", daemon=True).start()
+
+    def _features(self, name, X, cache):
+        # one transform per preprocessing group and batch
+        group = self.registry.group(name)
+        if group not in cache:
+            cache[group] = self.registry.models[name][:-1].transform(X)
+        return cache[group]
+
+    def _predict(self, name, X, cache):
+        start = time.perf_counter()
+        predictions = self.registry.models[name].steps[-1][1].predict(self._features(name, X, cache))
+        return np.asarray(predictions), time.perf_counter() - start
+
+    def score(self, df, shadow=True):
+        """
+        Predictions of the primary model for a batch, shadow models are scored asynchronously.
+
+        Args:
+            df (pd.DataFrame): Model features, one row per request.
+            shadow (bool): Queue the batch for the shadow models, False for synthetic traffic.
+
+        Returns:
+            np.ndarray: Primary model predictions, in the order of the rows.
+        """
+        X = df.drop(columns=[column for column in IGNORED_FEATURES if column in df.columns])
+        cache = {}
+        predictions, latency = self._predict(self.primary, X, cache)
+        if shadow and self._queue is not None:
+            try:
+                self._queue.put_nowait((X, cache, predictions, latency))
+            except queue.Full:
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 100 == 0:
+                    logger.warning("shadow scoring behind, %d batches dropped so far", self.dropped)
+        return predictions
+
+    def _shadow_worker(self):
+        while True:
+            self._score_shadows(*self._queue.get())
+
+    def _score_shadows(self, X, cache, primary_predictions, primary_latency):
+        try:
+            entries = []
+            timestamp = dt.datetime.now().isoformat(timespec='milliseconds')
+            for name in self.shadows:
+                predictions, latency = self._predict(name, X, cache)
+                entries.append({
+                    'time': timestamp,
+                    'model': name,
+                    'primary': self.primary,
+                    'rows': len(X),
+                    'shared_features': self.registry.group(name) == self.registry.group(self.primary),
+                    'latency_ms': latency * 1000,
+                    'primary_latency_ms': primary_latency * 1000,
+                    'mean_abs_diff': float(np.mean(np.abs(predictions - primary_predictions))),
+                    'predictions': predictions.tolist(),
+                    'primary_predictions': primary_predictions.tolist(),
+                })
+            with open(self.log_path, "a") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry) + "\n")
+        except Exception:
+            # a failing shadow model must never affect the answers
+            logger.exception("shadow scoring failed")
+
+
+def build_scorer(primary_model=None, primary=PRIMARY_MODEL, shadows=SHADOW_MODELS, log_path=SHADOW_LOG):
+    """Scorer with the primary model (already loaded or loaded here) and the shadow models found on disk."""
+    registry = ModelRegistry()
+    registry.register(primary, primary_model)
+    available = []
+    for name in shadows:
+        if not os.path.exists(f"{name}.pkl"):
+            logger.warning("shadow model %s.pkl not found, skipped", name)
+            continue
+        registry.register(name)
+        available.append(name)
+    return Scorer(registry, primary, available, log_path)
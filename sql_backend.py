@@ -0,0 +1,126 @@
+#SQL BACKEND
+import os
+import sqlite3
+import threading
+import functools
+import pandas as pd
+from timeindex import load_indexed
+from persistent_cache import file_hash
+
+DB_PATH = os.environ.get("BIKES_DB_PATH", os.path.join(".cache", "bikes.sqlite"))
+
+# Columns users can filter and group by, each one gets an index
+DIMENSIONS = ['yr', 'season', 'mnth', 'hr', 'weekday', 'holiday', 'workingday', 'weathersit', 'TOD', 'Rush', 'Wind', 'Hum']
+
+# Aggregates computed by the engine for every group
+MEASURES = {
+    'total_casual': 'SUM(casual)',
+    'total_registered': 'SUM(registered)',
+    'total_bikes': 'SUM(cnt)',
+    'avg_bikes': 'AVG(cnt)',
+    'hours': 'COUNT(*)',
+}
+
+# SQLite column names are case insensitive, the raw humidity is left out as it would collide with the Hum level
+_TABLE_COLUMNS = ['date'] + DIMENSIONS + ['temp', 'atemp', 'windspeed', 'casual', 'registered', 'cnt']
+
+
+class HourlyDatabase:
+    """
+    Hourly rental data held in an embedded SQLite database for ad-hoc drill-downs.
+
+    The table is rebuilt only when the source CSV changes (tracked by its content
+    hash), filters and group-bys run in the engine as parameterized queries.
+    """
+
+    def __init__(self, data_path="bikes_data_viz.csv", db_path=DB_PATH):
+        self.data_path = data_path
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._load()
+
+    def _load(self):
+        dataset = file_hash(self.data_path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'dataset'").fetchone()
+        if row is not None and row[0] == dataset:
+            return
+
+        data = load_indexed(self.data_path)
+        data['date'] = data.index.strftime('%Y-%m-%d %H:%M:%S')
+        with self._conn:
+            self._conn.execute("DROP TABLE IF EXISTS hourly")
+            data[_TABLE_COLUMNS].to_sql('hourly', self._conn, index=False)
+            self._conn.execute("CREATE INDEX hourly_date ON hourly (date)")
+            for column in DIMENSIONS:
+                self._conn.execute(f"CREATE INDEX hourly_{column} ON hourly ({column})")
+            self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('dataset', ?)", (dataset,))
+        self._conn.execute("ANALYZE")
+
+    def values(self, column):
+        """Distinct values of a dimension, to fill the filter widgets."""
+        if column not in DIMENSIONS:
+            raise ValueError(f"unknown dimension {column!r}")
+        with self._lock:
+            rows = self._conn.execute(f"SELECT DISTINCT {column} FROM hourly ORDER BY {column}").fetchall()
+        return [value for value, in rows]
+
+    def drilldown(self, filters=None, group_by=(), first_day=None, last_day=None):
+        """
+        Aggregate the hourly data for any combination of filters and group-by dimensions.
+
+        Args:
+            filters (dict): Dimension name -> list of accepted values, an empty list means no filter.
+            group_by (sequence): Dimension names to group by, in order.
+            first_day (datetime.date): First day to include, None for the start of the data.
+            last_day (datetime.date): Last day to include, None for the end of the data.
+
+        Returns:
+            pd.DataFrame: One row per group with the group-by columns and the MEASURES.
+        """
+        filters = filters or {}
+        unknown = [column for column in list(filters) + list(group_by) if column not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"unknown dimensions {unknown}")
+
+        where, params = [], []
+        for column, accepted in filters.items():
+            if accepted:
+                where.append(f"{column} IN ({', '.join('?' * len(accepted))})")
+                params.extend(accepted)
+        if first_day is not None:
+            where.append("date >= ?")
+            params.append(f"{first_day} 00:00:00")
+        if last_day is not None:
+            where.append("date <= ?")
+            params.append(f"{last_day} 23:59:59")
+
+        select = list(group_by) + [f"{expression} AS {name}" for name, expression in MEASURES.items()]
+        query = f"SELECT {', '.join(select)} FROM hourly"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        if group_by:
+            query += f" GROUP BY {', '.join(group_by)} ORDER BY {', '.join(group_by)}"
+
+        with self._lock:
+            return pd.read_sql_query(query, self._conn, params=params)
+
+
+@functools.lru_cache(maxsize=None)
+def get_database(data_path="bikes_data_viz.csv", db_path=DB_PATH):
+    """Database instance shared by all sessions of the process."""
+    return HourlyDatabase(data_path, db_path)
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_drilldown(data_path, filters, group_by, first_day, last_day):
+    return get_database(data_path).drilldown(dict(filters), group_by, first_day, last_day)
+
+
+def drilldown(filters=None, group_by=(), first_day=None, last_day=None, data_path="bikes_data_viz.csv"):
+    """Cached drill-down query, identical requests from any session share one result (do not mutate it)."""
+    frozen = tuple(sorted((column, tuple(accepted)) for column, accepted in (filters or {}).items() if accepted))
+    return _cached_drilldown(data_path, frozen, tuple(group_by), first_day, last_day)
@@ -0,0 +1,54 @@
+#CALENDAR TABLE TESTS
+import os
+import datetime as dt
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+
+from calendar_table import dc_holidays, CalendarTable, CALENDAR_COLUMNS
+from timeindex import derive_dates
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def hours():
+    return pd.read_csv(os.path.join(ROOT, "hour.csv"))
+
+
+@pytest.fixture(scope="module")
+def calendar():
+    return CalendarTable(2011, 2013)
+
+
+@pytest.mark.parametrize("year", [2011, 2012])
+def test_dc_holidays_match_dataset(hours, year):
+    days = pd.to_datetime(hours.loc[hours['holiday'] == 1, 'dteday']).dt.date
+    assert dc_holidays(year) == {day for day in days if day.year == year}
+
+
+def test_dc_holidays_observed_on_weekdays():
+    # Independence Day 2021 was a Sunday, observed on Monday; Christmas 2021 a Saturday, observed on Friday
+    holidays = dc_holidays(2021)
+    assert dt.date(2021, 7, 5) in holidays and dt.date(2021, 12, 24) in holidays
+    assert dt.date(2021, 6, 18) in holidays  # Juneteenth on a Saturday
+    assert dt.date(2021, 1, 20) in holidays  # Inauguration Day
+
+
+def test_join_matches_cleaned_data(calendar):
+    clean = pd.read_csv(os.path.join(ROOT, "bikes_clean_data.csv"))
+    # the cleaned data lost dteday, rebuilt from its weekday progression
+    joined = calendar.join(derive_dates(clean), clean['hr'])
+    for column in CALENDAR_COLUMNS:
+        np.testing.assert_array_equal(joined[column].to_numpy(), clean[column].to_numpy(), err_msg=column)
+
+
+def test_lookup_agrees_with_join(calendar):
+    day = dt.date(2012, 7, 4)
+    assert calendar.lookup(day, 8) == calendar.join([day], [8]).iloc[0].to_dict()
+
+
+def test_lookup_outside_range(calendar):
+    with pytest.raises(ValueError):
+        calendar.lookup(dt.date(2030, 1, 1), 0)
@@ -0,0 +1,70 @@
+#MEMORY WATCH TESTS
+import tracemalloc
+import pytest
+
+import memwatch
+from memwatch import leak_alert, GROWTH_RERUNS, GROWTH_KIB
+
+
+def run(retained_kib=0, figures_before=0, figures_after=0):
+    return {'retained_bytes': retained_kib * 1024, 'figures_before': figures_before, 'figures_after': figures_after}
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    tracing = tracemalloc.is_tracing()
+    monkeypatch.setattr(memwatch, "ENABLED", True)
+    memwatch.reset()
+    yield
+    memwatch.reset()
+    if not tracing:
+        tracemalloc.stop()
+
+
+def test_no_alert_before_enough_reruns():
+    assert leak_alert([run(GROWTH_KIB * 10)] * (GROWTH_RERUNS - 1)) is None
+
+
+def test_alert_on_steady_growth():
+    assert leak_alert([run(GROWTH_KIB)] * GROWTH_RERUNS) is not None
+
+
+def test_no_alert_when_memory_is_released():
+    history = [run(GROWTH_KIB)] * (GROWTH_RERUNS - 1) + [run(-1)]
+    assert leak_alert(history) is None
+
+
+def test_alert_on_unclosed_figures():
+    history = [run(figures_before=i, figures_after=i + 1) for i in range(GROWTH_RERUNS)]
+    assert "matplotlib" in leak_alert(history)
+
+
+def test_history_is_bounded_and_dropped_with_the_session(enabled):
+    for _ in range(GROWTH_RERUNS + 5):
+        with memwatch.watch_page("page", session="s1"):
+            pass
+    with memwatch.watch_page("page", session="s2"):
+        pass
+    assert len(memwatch._recent["s1", "page"]) == GROWTH_RERUNS
+    assert {row['session']: row['reruns'] for row in memwatch.report()} == {"s1": GROWTH_RERUNS + 5, "s2": 1}
+    memwatch.end_session("s1")
+    assert [row['session'] for row in memwatch.report()] == ["s2"]
+
+
+def test_expired_sessions_are_forgotten(enabled, monkeypatch):
+    with memwatch.watch_page("page", session="old"):
+        pass
+    monkeypatch.setattr(memwatch, "SESSION_TTL_S", -1)
+    with memwatch.watch_page("page", session="new"):
+        pass
+    assert [row['session'] for row in memwatch.report()] == ["new"]
+
+
+def test_alert_logs_top_allocations(enabled, caplog):
+    kept = []
+    for _ in range(GROWTH_RERUNS):
+        with memwatch.watch_page("leaky", session="s1"):
+            kept.append(bytearray(GROWTH_KIB * 1024))
+    assert "top allocations" in caplog.text
+    assert ("s1", "leaky") in memwatch._snapshots
+    assert memwatch.report()[0]['alerts'] == 1
@@ -0,0 +1,60 @@
+#SMOKE TESTS
+"""Every page of the app renders without raising, run headless with Streamlit's AppTest."""
+import os
+import tempfile
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# keep the test caches away from the app ones, before any project module is imported
+_tmp = tempfile.mkdtemp(prefix="bikes-test-")
+os.environ["BIKES_CACHE_PATH"] = os.path.join(_tmp, "cache.sqlite")
+os.environ["BIKES_DB_PATH"] = os.path.join(_tmp, "bikes.sqlite")
+
+AppTest = pytest.importorskip("streamlit.testing.v1").AppTest
+
+# module, page function, media files the page shows (media/ is not tracked)
+PAGES = [
+    ("main_page", "main_page", ["bike0.png", "nicole.jpg", "nilesh.png", "alejandro.png", "charles.png", "nic.png"]),
+    ("interactive", "bike_rental_dashboard", []),
+    ("features", "main_feature_engineering", ["pycaret.png"]),
+    ("results", "main_results", []),
+    ("business", "bike_sharing_business", []),
+    ("bikeprediction3", "main_bikeprediction", []),
+]
+
+
+def _missing_media(names):
+    return [name for name in names if not os.path.exists(os.path.join(ROOT, "media", name))]
+
+
+def _run_page(root, module_name, function_name):
+    # runs inside AppTest, from a temporary script file
+    import sys
+    import importlib
+    sys.path.insert(0, root)
+    getattr(importlib.import_module(module_name), function_name)()
+
+
+@pytest.fixture(autouse=True)
+def in_repository(monkeypatch):
+    # pages read their data and model relative to the repository
+    monkeypatch.chdir(ROOT)
+
+
+@pytest.mark.parametrize("module_name, function_name", [
+    pytest.param(module_name, function_name, marks=pytest.mark.skipif(bool(_missing_media(media)), reason=f"media files missing: {_missing_media(media)}"))
+    for module_name, function_name, media in PAGES
+])
+def test_page_renders(module_name, function_name):
+    at = AppTest.from_function(_run_page, args=(ROOT, module_name, function_name), default_timeout=300)
+    at.run()
+    assert not at.exception, at.exception[0].message if at.exception else ""
+
+
+def test_dashboard_drilldown_filters():
+    at = AppTest.from_function(_run_page, args=(ROOT, "interactive", "bike_rental_dashboard"), default_timeout=300)
+    at.run()
+    weather = next(widget for widget in at.multiselect if widget.label == "Weather Situation")
+    weather.select(weather.options[0]).run()
+    assert not at.exception, at.exception[0].message
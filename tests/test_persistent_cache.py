@@ -0,0 +1,62 @@
+#PERSISTENT CACHE TESTS
+import itertools
+import pytest
+
+pytest.importorskip("joblib")
+
+import persistent_cache
+from persistent_cache import PersistentCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # strictly increasing access times, the eviction order does not depend on the timer resolution
+    ticks = itertools.count(1)
+    monkeypatch.setattr(persistent_cache.time, "time", lambda: float(next(ticks)))
+
+
+def test_get_or_compute_stores_on_miss(tmp_path):
+    cache = PersistentCache(str(tmp_path / "cache.sqlite"))
+    calls = []
+    compute = lambda: calls.append(1) or {'value': 1}
+    assert cache.get_or_compute("ns", ("key", 1), compute) == {'value': 1}
+    assert cache.get_or_compute("ns", ("key", 1), compute) == {'value': 1}
+    assert len(calls) == 1
+    assert cache.get("other", ("key", 1)) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    blob = b"x" * 1000
+    cache = PersistentCache(str(tmp_path / "cache.sqlite"), max_bytes=2500)
+    cache.set("ns", "a", blob)
+    cache.set("ns", "b", blob)
+    cache.get("ns", "a")
+    cache.set("ns", "c", blob)
+    assert cache.get("ns", "b") is None
+    assert cache.get("ns", "a") == blob and cache.get("ns", "c") == blob
+    assert cache.size() <= 2500
+
+
+def test_unreadable_entry_is_a_miss_and_dropped(tmp_path):
+    cache = PersistentCache(str(tmp_path / "cache.sqlite"))
+    cache.set("ns", "key", [1, 2, 3])
+    cache._conn.execute("UPDATE entries SET value = ?", (b"not a pickle",))
+    assert cache.get("ns", "key", "missing") == "missing"
+    assert cache.size() == 0
+    assert cache.get_or_compute("ns", "key", lambda: [4]) == [4]
+
+
+def test_clear_namespace(tmp_path):
+    cache = PersistentCache(str(tmp_path / "cache.sqlite"))
+    cache.set("old", "key", 1)
+    cache.set("new", "key", 2)
+    cache.clear("old")
+    assert cache.get("old", "key") is None and cache.get("new", "key") == 2
+
+
+def test_namespace_changes_with_cache_version(tmp_path, monkeypatch):
+    path = tmp_path / "data.csv"
+    path.write_text("a,b\n1,2\n")
+    before = persistent_cache.namespace(str(path))
+    monkeypatch.setattr(persistent_cache, "CACHE_VERSION", persistent_cache.CACHE_VERSION + 1)
+    assert persistent_cache.namespace(str(path)) != before
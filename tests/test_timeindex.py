@@ -0,0 +1,46 @@
+#TIME INDEX TESTS
+import os
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+
+from timeindex import derive_dates, hourly_index, window_bounds, time_slice, date_slice, time_split
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def hours():
+    return pd.read_csv(os.path.join(ROOT, "hour.csv"))
+
+
+def test_derive_dates_matches_original_dates(hours):
+    dates = derive_dates(hours)
+    np.testing.assert_array_equal(dates, pd.to_datetime(hours['dteday']).to_numpy(dtype='datetime64[D]'))
+
+
+def test_derive_dates_survives_missing_days():
+    # 2011-01-01 is a Saturday (6), the 2nd and 3rd are missing, the 4th is a Tuesday (2)
+    df = pd.DataFrame({'yr': [0, 0, 0], 'mnth': [1, 1, 2], 'weekday': [6, 2, 2]})
+    assert list(derive_dates(df).astype(str)) == ["2011-01-01", "2011-01-04", "2011-02-01"]
+
+
+def test_hourly_index_adds_hours(hours):
+    index = hourly_index(hours.head(3))
+    assert list(index) == [pd.Timestamp("2011-01-01 00:00"), pd.Timestamp("2011-01-01 01:00"), pd.Timestamp("2011-01-01 02:00")]
+
+
+def test_time_slice_is_half_open():
+    series = pd.Series(range(48), index=pd.date_range("2012-01-01", periods=48, freq="h"))
+    assert window_bounds(series.index, "2012-01-01 10:00", "2012-01-01 12:00") == (10, 12)
+    assert list(time_slice(series, "2012-01-01 10:00", "2012-01-01 12:00")) == [10, 11]
+    assert len(time_slice(series, "2013-01-01")) == 0
+    assert len(date_slice(series, pd.Timestamp("2012-01-02").date(), pd.Timestamp("2012-01-02").date())) == 24
+
+
+def test_time_split_is_chronological_without_overlap():
+    df = pd.DataFrame({'x': range(11)}, index=pd.date_range("2012-01-01", periods=11, freq="h"))
+    train, test = time_split(df, test_size=0.2)
+    assert len(train) == 8 and len(test) == 3
+    assert train.index.max() < test.index.min()
@@ -0,0 +1,28 @@
+#TRAINING TESTS
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("xgboost")
+pytest.importorskip("pycaret")
+from sklearn.metrics import r2_score
+
+from training import weighted_r2
+
+
+def test_perfect_predictions():
+    y = np.array([10.0, 20.0, 30.0])
+    assert weighted_r2(y, y) == pytest.approx(1.0)
+
+
+def test_equal_to_r2_without_under_prediction():
+    y = np.array([10.0, 20.0, 30.0, 40.0])
+    y_pred = y + np.array([1.0, 5.0, 0.0, 2.0])
+    assert weighted_r2(y, y_pred) == pytest.approx(r2_score(y, y_pred))
+
+
+def test_under_prediction_weighs_more():
+    y = np.array([10.0, 20.0, 30.0, 40.0])
+    over, under = y + 5, y - 5
+    assert weighted_r2(y, under) < weighted_r2(y, over)
+    # squared errors of 25 on 4 rows, doubled, over a total sum of squares of 500
+    assert weighted_r2(y, under, under_weight=2.0) == pytest.approx(1 - 200 / 500)
@@ -0,0 +1,111 @@
+#TIME INDEX
+import math
+import numpy as np
+import pandas as pd
+
+# First year of the dataset, `yr` is stored as an offset from it (0: 2011, 1: 2012)
+BASE_YEAR = 2011
+
+
+def derive_dates(df):
+    """
+    Rebuild the calendar date of every row of a cleaned frame that lost `dteday`.
+
+    Rows must be in chronological order. Inside a month, the day advances by the
+    number of days between consecutive `weekday` values (0: Sunday ... 6: Saturday),
+    the first row of each month is anchored on the weekday of the 1st.
+
+    Args:
+        df (pd.DataFrame): Frame with `yr`, `mnth` and `weekday` columns.
+
+    Returns:
+        np.ndarray: datetime64[D] array with one date per row.
+    """
+    years = df['yr'].to_numpy(dtype=np.int64) + BASE_YEAR
+    months = df['mnth'].to_numpy(dtype=np.int64)
+    weekdays = df['weekday'].to_numpy(dtype=np.int64)
+
+    month_start = (years - 1970) * 12 + (months - 1)
+    first_day = month_start.astype('datetime64[M]').astype('datetime64[D]')
+    # numpy epoch (1970-01-01) was a Thursday, shift so that Sunday is 0 like `weekday`
+    first_weekday = (first_day.astype(np.int64) + 4) % 7
+
+    new_month = np.ones(len(df), dtype=bool)
+    new_month[1:] = month_start[1:] != month_start[:-1]
+
+    gaps = np.empty(len(df), dtype=np.int64)
+    gaps[new_month] = (weekdays[new_month] - first_weekday[new_month]) % 7
+    gaps[~new_month] = (weekdays[1:] - weekdays[:-1])[~new_month[1:]] % 7
+
+    offsets = pd.Series(gaps).groupby(np.cumsum(new_month)).cumsum().to_numpy()
+    return first_day + offsets.astype('timedelta64[D]')
+
+
+def hourly_index(df):
+    """
+    Build the real hourly timestamps of a frame from its date and `hr` columns.
+
+    Uses `dteday` when present (original `hour.csv`), otherwise derives the date
+    from `yr`, `mnth` and `weekday` (cleaned and visualization datasets).
+    """
+    if 'dteday' in df.columns:
+        dates = pd.to_datetime(df['dteday']).to_numpy(dtype='datetime64[D]')
+    else:
+        dates = derive_dates(df)
+    hours = df['hr'].to_numpy(dtype=np.int64).astype('timedelta64[h]')
+    return pd.DatetimeIndex(dates + hours, name='date')
+
+
+def with_time_index(df):
+    """Return a copy of `df` indexed by its hourly timestamp and sorted chronologically."""
+    df = df.copy()
+    df.index = hourly_index(df)
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index(kind='stable')
+    return df
+
+
+def load_indexed(data_path):
+    """Read one of the bundled CSV files and index it by hourly timestamp."""
+    return with_time_index(pd.read_csv(data_path))
+
+
+def window_bounds(index, start=None, end=None):
+    """
+    Positions [lo, hi) of the rows of a sorted DatetimeIndex falling in [start, end).
+
+    Both bounds are found by binary search, so the cost is O(log n) whatever the
+    size of the frame. A missing bound means the start/end of the data.
+    """
+    lo = 0 if start is None else int(index.searchsorted(pd.Timestamp(start), side='left'))
+    hi = len(index) if end is None else int(index.searchsorted(pd.Timestamp(end), side='left'))
+    return lo, max(lo, hi)
+
+
+def time_slice(df, start=None, end=None):
+    """Rows of a time indexed frame (or series) with a timestamp in [start, end)."""
+    lo, hi = window_bounds(df.index, start, end)
+    return df.iloc[lo:hi]
+
+
+def date_slice(df, first_day=None, last_day=None):
+    """Rows of a time indexed frame between two calendar days, both days included."""
+    end = None if last_day is None else pd.Timestamp(last_day) + pd.Timedelta(days=1)
+    return time_slice(df, first_day, end)
+
+
+def date_range(df):
+    """First and last calendar day covered by a time indexed frame."""
+    return df.index[0].date(), df.index[-1].date()
+
+
+def time_split(df, test_size=0.2):
+    """
+    Chronological train/test split: the last `test_size` share of the rows is the test set.
+
+    Returns:
+        tuple: (train, test) frames, with no overlapping rows.
+    """
+    n_test = math.ceil(len(df) * test_size)
+    split = len(df) - n_test
+    return df.iloc[:split], df.iloc[split:]
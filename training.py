@@ -0,0 +1,291 @@
+#MODEL TRAINING
+"""
+Reproducible retraining of the bike demand model over bikes_clean_data.csv.
+
+    python training.py search --trials 40 --workers 4
+    python training.py update --rounds 100
+
+`search` runs a hyperparameter search scored with the weighted R2 under
+time-series cross validation, fanning the trials out over a process pool, then
+fits and publishes a new model version. `update` warm-starts from the booster of
+the served model and adds trees fitted on the months it has not seen yet.
+Published versions are picked up by the app on its next start (see model_store.py).
+
+Both commands also save an evaluation model fitted without the last 20% of the
+hours they train on, the Results page scores it on those held out hours.
+"""
+import copy
+import math
+import argparse
+import datetime as dt
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+from xgboost import XGBRegressor
+from pycaret.classification import load_model
+from model_store import served_model, latest_metadata, save_version
+from persistent_cache import file_hash
+from timeindex import load_indexed, time_slice, time_split
+
+TARGET = "cnt"
+
+# Same features as the PyCaret setup: categorical ones are one-hot encoded, weathersit keeps its order
+CATEGORICAL_FEATURES = ['season', 'mnth', 'hr', 'holiday', 'weekday', 'workingday', 'TOD', 'Rush', 'Wind', 'Hum']
+NUMERIC_FEATURES = ['weathersit', 'temp']
+FEATURES = CATEGORICAL_FEATURES + NUMERIC_FEATURES
+
+# Under-predicting (too few bikes) costs this many times more than over-predicting
+UNDER_PREDICTION_WEIGHT = 2.0
+
+EARLY_STOPPING_ROUNDS = 50
+# last part of each training fold, held out to decide when boosting stops
+EARLY_STOPPING_FRACTION = 0.1
+
+# last part of the hours kept out of the evaluation model
+TEST_SIZE = 0.2
+
+BASE_PARAMS = {'objective': 'reg:squarederror', 'tree_method': 'hist', 'n_estimators': 2000}
+
+
+def weighted_r2(y_true, y_pred, under_weight=UNDER_PREDICTION_WEIGHT):
+    """
+    R2 where the squared error of every under-predicted hour weighs `under_weight` times more.
+
+    Equal to the usual R2 when the model never under-predicts, lower otherwise.
+    """
+    y_true = np.asarray(y_true, dtype=float)
+    residuals = y_true - np.asarray(y_pred, dtype=float)
+    weights = np.where(residuals > 0, under_weight, 1.0)
+    return 1 - np.sum(weights * residuals ** 2) / np.sum((y_true - y_true.mean()) ** 2)
+
+
+def metrics(y_true, y_pred):
+    return {
+        'weighted_r2': float(weighted_r2(y_true, y_pred)),
+        'r2': float(r2_score(y_true, y_pred)),
+        'mae': float(mean_absolute_error(y_true, y_pred)),
+        'rmse': float(np.sqrt(mean_squared_error(y_true, y_pred))),
+    }
+
+
+def load_training_data(data_path="bikes_clean_data.csv"):
+    """Features and target in chronological order, indexed by hourly timestamp."""
+    df = load_indexed(data_path)
+    return df[FEATURES], df[TARGET]
+
+
+def build_preprocessor():
+    return ColumnTransformer([
+        ("categorical", OneHotEncoder(handle_unknown="ignore"), CATEGORICAL_FEATURES),
+        ("numeric", "passthrough", NUMERIC_FEATURES),
+    ])
+
+
+def sample_params(rng):
+    """One random point of the search space."""
+    return {
+        'learning_rate': float(10 ** rng.uniform(-2.3, -0.7)),
+        'max_depth': int(rng.integers(3, 11)),
+        'min_child_weight': float(10 ** rng.uniform(0, 1.5)),
+        'subsample': float(rng.uniform(0.5, 1.0)),
+        'colsample_bytree': float(rng.uniform(0.4, 1.0)),
+        'reg_lambda': float(10 ** rng.uniform(-1, 2)),
+    }
+
+
+# data shared by the trials of one worker process, sent once when the pool starts
+_worker_data = {}
+
+
+def _init_worker(X, y, folds):
+    _worker_data.update(X=X, y=y, folds=folds)
+
+
+def _evaluate(trial, params, seed):
+    """
+    Time-series CV of one parameter set.
+
+    Boosting stops when the error on the last hours of the training fold stalls,
+    so the validation fold the trial is scored on never picks the number of trees.
+    """
+    X, y = _worker_data['X'], _worker_data['y']
+    scores, rounds = [], []
+    for train_rows, valid_rows in _worker_data['folds']:
+        n_stop = math.ceil(len(train_rows) * EARLY_STOPPING_FRACTION)
+        fit_rows, stop_rows = train_rows[:-n_stop], train_rows[-n_stop:]
+        preprocessor = build_preprocessor()
+        X_fit = preprocessor.fit_transform(X.iloc[fit_rows])
+        X_stop = preprocessor.transform(X.iloc[stop_rows])
+        X_valid = preprocessor.transform(X.iloc[valid_rows])
+        model = XGBRegressor(**BASE_PARAMS, **params, early_stopping_rounds=EARLY_STOPPING_ROUNDS, n_jobs=1, random_state=seed)
+        model.fit(X_fit, y.iloc[fit_rows], eval_set=[(X_stop, y.iloc[stop_rows])], verbose=False)
+        scores.append(weighted_r2(y.iloc[valid_rows], model.predict(X_valid)))
+        rounds.append(model.best_iteration + 1)
+    return {
+        'trial': trial,
+        'params': params,
+        'score': float(np.mean(scores)),
+        'fold_scores': [float(score) for score in scores],
+        'n_estimators': int(np.mean(rounds)),
+    }
+
+
+def search(X, y, n_trials=40, workers=4, patience=15, n_splits=5, seed=0):
+    """
+    Random search of XGBoost parameters maximizing the mean weighted R2 over time-series folds.
+
+    Trials run in parallel over a process pool, their results are read in trial order
+    so the search gives the same result for the same seed whatever the number of
+    workers. It stops early once `patience` trials in a row did not improve on the
+    best one, later trials are cancelled or ignored.
+
+    Returns:
+        tuple: (best trial, every trial read up to the stop) as dicts.
+    """
+    rng = np.random.default_rng(seed)
+    candidates = [sample_params(rng) for _ in range(n_trials)]
+    folds = list(TimeSeriesSplit(n_splits=n_splits).split(X))
+
+    best, finished, since_best = None, [], 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y, folds)) as pool:
+        futures = [pool.submit(_evaluate, trial, params, seed) for trial, params in enumerate(candidates)]
+        for future in futures:
+            result = future.result()
+            finished.append(result)
+            print(f"trial {result['trial']:3d}: weighted R2 {result['score']:.4f} ({result['n_estimators']} trees)")
+            if best is None or result['score'] > best['score']:
+                best, since_best = result, 0
+            else:
+                since_best += 1
+            if patience and since_best >= patience:
+                print(f"no improvement in {patience} trials, stopping the search")
+                for pending in futures:
+                    pending.cancel()
+                break
+    return best, finished
+
+
+def fit_pipeline(X, y, params, n_estimators, seed=0):
+    estimator = XGBRegressor(**dict(BASE_PARAMS, n_estimators=n_estimators), **params, random_state=seed)
+    return Pipeline([("preprocess", build_preprocessor()), ("actual_estimator", estimator)]).fit(X, y)
+
+
+def retrain(data_path="bikes_clean_data.csv", n_trials=40, workers=4, patience=15, seed=0, publish=True):
+    """
+    Search, evaluate on the last 20% of the hours, refit on all of them and save a new version.
+
+    The pipeline fitted on the first 80% is saved as the evaluation model of the version.
+    """
+    X, y = load_training_data(data_path)
+    X_train, X_test = time_split(X, test_size=TEST_SIZE)
+    y_train, y_test = time_split(y, test_size=TEST_SIZE)
+
+    best, finished = search(X_train, y_train, n_trials, workers, patience, seed=seed)
+    evaluation = fit_pipeline(X_train, y_train, best['params'], best['n_estimators'], seed)
+    holdout = metrics(y_test, evaluation.predict(X_test))
+    print(f"holdout: {holdout}")
+
+    pipeline = fit_pipeline(X, y, best['params'], best['n_estimators'], seed)
+    metadata = {
+        'mode': 'search',
+        'trained_at': dt.datetime.now().isoformat(timespec='seconds'),
+        'trained_until': str(X.index[-1]),
+        'data_hash': file_hash(data_path),
+        'params': best['params'],
+        'n_estimators': best['n_estimators'],
+        'cv_weighted_r2': best['score'],
+        'cv_fold_scores': best['fold_scores'],
+        'trials': len(finished),
+        'test_from': str(X_test.index[0]),
+        'holdout': holdout,
+    }
+    return save_version(pipeline, metadata, publish, evaluation)
+
+
+def warm_start(data_path="bikes_clean_data.csv", since=None, rounds=100, publish=True):
+    """
+    Add `rounds` trees to the served model, fitted on the hours after `since`.
+
+    The preprocessing of the served model is kept, so the new trees see the same
+    feature matrix as the existing ones. `since` defaults to the end of the data
+    the served model was trained on. The evaluation model gets its trees from the
+    first 80% of the new hours only and is scored on the last 20%.
+    """
+    parent = served_model()
+    since = since or latest_metadata(parent).get('trained_until')
+    if since is None:
+        raise ValueError(f"{parent} has no training metadata, give the start of the new data with --since")
+
+    X, y = load_training_data(data_path)
+    start = pd.Timestamp(since) + pd.Timedelta(hours=1)
+    X_new, y_new = time_slice(X, start), time_slice(y, start)
+    if X_new.empty:
+        print(f"no data after {since}, nothing to update")
+        return parent
+
+    current = load_model(model_name=parent, verbose=False)
+    step_name, booster = current.steps[-1]
+    params = dict(booster.get_params(), n_estimators=rounds, early_stopping_rounds=None)
+
+    def add_trees(X_fit, y_fit):
+        estimator = XGBRegressor(**params)
+        estimator.fit(current[:-1].transform(X_fit), y_fit, xgb_model=booster.get_booster(), verbose=False)
+        pipeline = copy.copy(current)
+        pipeline.steps = current.steps[:-1] + [(step_name, estimator)]
+        return pipeline
+
+    X_fit, X_test = time_split(X_new, test_size=TEST_SIZE)
+    y_fit, y_test = time_split(y_new, test_size=TEST_SIZE)
+    evaluation = add_trees(X_fit, y_fit)
+    holdout = metrics(y_test, evaluation.predict(X_test))
+    print(f"holdout: {holdout}")
+
+    pipeline = add_trees(X_new, y_new)
+
+    metadata = {
+        'mode': 'warm_start',
+        'parent': parent,
+        'trained_at': dt.datetime.now().isoformat(timespec='seconds'),
+        'trained_from': str(X_new.index[0]),
+        'trained_until': str(X_new.index[-1]),
+        'data_hash': file_hash(data_path),
+        'added_rounds': rounds,
+        'rows': len(X_new),
+        'test_from': str(X_test.index[0]),
+        'parent_holdout': metrics(y_test, current.predict(X_test)),
+        'holdout': holdout,
+    }
+    return save_version(pipeline, metadata, publish, evaluation)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrain the bike demand model.")
+    parser.add_argument("--data", default="bikes_clean_data.csv", help="cleaned hourly dataset")
+    parser.add_argument("--no-publish", action="store_true", help="save the version without making it the served model")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search_parser = commands.add_parser("search", help="hyperparameter search and full retraining")
+    search_parser.add_argument("--trials", type=int, default=40, help="number of sampled parameter sets")
+    search_parser.add_argument("--workers", type=int, default=4, help="parallel trial processes")
+    search_parser.add_argument("--patience", type=int, default=15, help="stop after this many trials without improvement (0 to run them all)")
+    search_parser.add_argument("--seed", type=int, default=0)
+
+    update_parser = commands.add_parser("update", help="warm start from the served model on new data")
+    update_parser.add_argument("--since", default=None, help="last timestamp already seen by the served model")
+    update_parser.add_argument("--rounds", type=int, default=100, help="number of trees to add")
+
+    args = parser.parse_args()
+    if args.command == "search":
+        name = retrain(args.data, args.trials, args.workers, args.patience, args.seed, not args.no_publish)
+    else:
+        name = warm_start(args.data, args.since, args.rounds, not args.no_publish)
+    print(f"model saved as {name}.pkl")
+
+
+if __name__ == '__main__':
+    main()
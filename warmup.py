@@ -0,0 +1,82 @@
+#CACHE WARM-UP
+"""
+Populate the on-disk cache before the app takes traffic, e.g. right after a deploy:
+
+    python warmup.py --days 7 --temps 1 10 20
+"""
+import time
+import argparse
+import datetime as dt
+import itertools
+import pandas as pd
+from persistent_cache import get_cache, namespace, MODEL_PATH
+from timeindex import date_range
+from interactive import load_dashboard_data, filter_dashboard_data, dashboard_aggregates
+from results import evaluate_model
+
+
+def warm_datasets(viz_path="bikes_data_viz.csv"):
+    cache = get_cache()
+    cache.get_or_compute(namespace(viz_path), "raw_data", lambda: pd.read_csv(viz_path))
+    load_dashboard_data(viz_path)
+
+
+def warm_dashboard(viz_path="bikes_data_viz.csv"):
+    # default filters of the dashboard: every year selection over its full date range
+    data = load_dashboard_data(viz_path)
+    for year_selection in ["All Years"] + sorted(data['yr'].unique()):
+        first_day, last_day = date_range(filter_dashboard_data(data, year_selection))
+        dashboard_aggregates(viz_path, year_selection, first_day, last_day)
+
+
+def warm_evaluation(clean_path="bikes_clean_data.csv"):
+    evaluate_model(clean_path)
+
+
+def warm_predictions(days, temps, start=None):
+    """Score every form answer of the next `days` days in one batch and store them one by one."""
+    # imported here, loading the model is only needed for this step
+    from bikeprediction3 import batch_prediction, prediction_key, weathersit_codes
+
+    start = start or dt.date.today()
+    dates = [start + dt.timedelta(days=i) for i in range(days)]
+    grid = list(itertools.product(dates, range(24), weathersit_codes, temps, ("Low", "Medium", "High"), ("Low", "Medium", "High")))
+    requests = pd.DataFrame(grid, columns=['dteday', 'hr', 'weathersit', 'temp', 'Wind', 'Hum'])
+
+    # synthetic answers, kept out of the shadow comparison of live traffic
+    predictions = batch_prediction(requests, shadow=False)
+
+    cache = get_cache()
+    model_namespace = namespace(MODEL_PATH)
+    for answer, predicted in zip(grid, predictions):
+        cache.set(model_namespace, prediction_key(*answer), predicted)
+    return len(grid)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Populate the on-disk cache of the bike sharing app.")
+    parser.add_argument("--days", type=int, default=7, help="number of days, from today, of prediction form answers to precompute (0 to skip)")
+    parser.add_argument("--temps", type=int, nargs="+", default=[1], help="temperatures in Celsius to precompute predictions for")
+    parser.add_argument("--clear", action="store_true", help="empty the cache before warming it up")
+    args = parser.parse_args()
+
+    if args.clear:
+        get_cache().clear()
+
+    steps = [
+        ("datasets", warm_datasets),
+        ("dashboard aggregates", warm_dashboard),
+        ("model evaluation", warm_evaluation),
+    ]
+    if args.days > 0:
+        steps.append(("predictions", lambda: warm_predictions(args.days, args.temps)))
+
+    for name, step in steps:
+        start = time.perf_counter()
+        step()
+        print(f"{name}: {time.perf_counter() - start:.2f}s")
+    print(f"cache size: {get_cache().size() / 2**20:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()